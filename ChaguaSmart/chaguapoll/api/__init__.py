@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Poll, Option, Vote
+from ..models import Poll, Option, Vote
 
 class OptionSerializer(serializers.ModelSerializer):
     class Meta:
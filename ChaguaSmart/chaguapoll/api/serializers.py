@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Poll, Option, Vote
+from ..models import Poll, Option, Vote
 
 
 class OptionSerializer(serializers.ModelSerializer):
@@ -10,7 +10,11 @@ class OptionSerializer(serializers.ModelSerializer):
         fields = ['id', 'option_text', 'vote_count']
     
     def get_vote_count(self, obj):
-        return obj.vote_set.count()
+        # Views annotate num_votes; fall back to a COUNT for bare instances
+        num_votes = getattr(obj, 'num_votes', None)
+        if num_votes is None:
+            return obj.vote_set.count()
+        return num_votes
 
 
 class PollSerializer(serializers.ModelSerializer):
@@ -32,7 +36,10 @@ class PollSerializer(serializers.ModelSerializer):
         ]
     
     def get_total_votes(self, obj):
-        return Vote.objects.filter(option__poll=obj).count()
+        num_votes = getattr(obj, 'num_votes', None)
+        if num_votes is None:
+            return Vote.objects.filter(option__poll=obj).count()
+        return num_votes
 
 
 class VoteSerializer(serializers.ModelSerializer):
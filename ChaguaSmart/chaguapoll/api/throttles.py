@@ -0,0 +1,35 @@
+from django.core.cache import cache
+
+from polls.throttles import PollVoteRateThrottle
+from ..models import Option
+
+
+def option_poll_key(option_id):
+    return f'chaguapoll_option_{option_id}_poll'
+
+
+class OptionPollVoteRateThrottle(PollVoteRateThrottle):
+    """PollVoteRateThrottle for votes that only name the option.
+
+    ``POST votes/`` sends ``{"option": id}``, so the poll is looked up from
+    the option. An option never moves to another poll, so the answer is
+    cached without expiry and repeat votes cost no query before they are
+    throttled.
+    """
+
+    def get_poll_id(self, request, view):
+        poll_id = super().get_poll_id(request, view)
+        if poll_id is not None or not hasattr(request.data, 'get'):
+            return poll_id
+        try:
+            option_id = int(request.data.get('option'))
+        except (TypeError, ValueError):
+            return None
+
+        key = option_poll_key(option_id)
+        poll_id = cache.get(key)
+        if poll_id is None:
+            poll_id = Option.objects.filter(pk=option_id).values_list('poll_id', flat=True).first()
+            if poll_id is not None:
+                cache.set(key, poll_id, None)
+        return poll_id
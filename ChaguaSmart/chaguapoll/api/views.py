@@ -1,20 +1,47 @@
+import math
+
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Count
-from .models import Poll, Option, Vote
+from django.db.models import Count, Prefetch
+from polls.pagination import VoteCursorPagination
+from polls.throttles import VoteRateThrottle
+from users.authentication import TokenClaimsJWTAuthentication
+from users.throttles import ThrottleFirstMixin
+from ..models import Poll, Option, Vote
 from .serializers import PollSerializer, VoteSerializer, PollCreateSerializer
 from .permissions import IsAdminOrReadOnly, CanVotePermission, IsPollCreatorOrAdmin
+from .throttles import OptionPollVoteRateThrottle
+
+
+def with_vote_counts(queryset):
+    """Load a poll queryset with everything PollSerializer needs.
+
+    The creator is joined, options are prefetched in one query with their
+    vote counts annotated as ``num_votes``, and each poll gets its own
+    ``num_votes`` total, so serializing a page costs a fixed number of
+    queries however many polls and options it holds.
+    """
+    options = Option.objects.annotate(num_votes=Count('vote'))
+    return queryset.select_related('created_by').prefetch_related(
+        Prefetch('options', queryset=options)
+    ).annotate(num_votes=Count('options__vote'))
 
 
 class PollViewSet(viewsets.ModelViewSet):
+    # Reads only need the token claims, not the user row
+    authentication_classes = [TokenClaimsJWTAuthentication, SessionAuthentication]
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
         # Filter active polls (using end_time instead of expiry_date)
-        return Poll.objects.filter(end_time__gt=timezone.now()).order_by('-start_time')
+        polls = Poll.objects.filter(end_time__gt=timezone.now()).order_by('-start_time')
+        return with_vote_counts(polls)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -35,17 +62,18 @@ class PollViewSet(viewsets.ModelViewSet):
     def active(self, request):
         """Get only currently active polls"""
         now = timezone.now()
-        active_polls = Poll.objects.filter(
+        active_polls = with_vote_counts(Poll.objects.filter(
             start_time__lte=now,
             end_time__gt=now
-        )
+        ))
         serializer = self.get_serializer(active_polls, many=True)
         return Response(serializer.data)
 
 
-class VoteAPIView(generics.CreateAPIView):
+class VoteAPIView(ThrottleFirstMixin, generics.CreateAPIView):
     serializer_class = VoteSerializer
     permission_classes = [IsAuthenticated, CanVotePermission]
+    throttle_classes = [VoteRateThrottle, OptionPollVoteRateThrottle]
 
     def create(self, request, *args, **kwargs):
         option_id = request.data.get('option')
@@ -98,28 +126,24 @@ class VoteAPIView(generics.CreateAPIView):
 
 
 class PollResultsAPIView(generics.RetrieveAPIView):
-    queryset = Poll.objects.all()
+    queryset = with_vote_counts(Poll.objects.all())
     serializer_class = PollSerializer
+    authentication_classes = [TokenClaimsJWTAuthentication, SessionAuthentication]
 
     def retrieve(self, request, *args, **kwargs):
         poll = self.get_object()
         
-        # Get options with vote counts
-        options_with_votes = Option.objects.filter(poll=poll).annotate(
-            vote_count=Count('vote')
-        )
-        
         results = {
             'poll': PollSerializer(poll).data,
             'results': [
                 {
                     'option_id': option.id,
                     'option_text': option.option_text,
-                    'vote_count': option.vote_count
+                    'vote_count': option.num_votes
                 }
-                for option in options_with_votes
+                for option in poll.options.all()
             ],
-            'total_votes': Vote.objects.filter(option__poll=poll).count()
+            'total_votes': poll.num_votes
         }
         
         return Response(results)
@@ -128,18 +152,56 @@ class PollResultsAPIView(generics.RetrieveAPIView):
 class UserVotesAPIView(generics.ListAPIView):
     serializer_class = VoteSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = VoteCursorPagination
 
     def get_queryset(self):
-        return Vote.objects.filter(user=self.request.user).order_by('-voted_at')
+        return Vote.objects.filter(user=self.request.user)
 
 
 class ActivePollsAPIView(generics.ListAPIView):
     serializer_class = PollSerializer
+    authentication_classes = [TokenClaimsJWTAuthentication, SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    # chaguapoll/signals.py deletes this whenever a poll or option changes
+    cache_key = 'chaguapoll_active_polls'
 
     def get_queryset(self):
         now = timezone.now()
-        return Poll.objects.filter(
+        return with_vote_counts(Poll.objects.filter(
             start_time__lte=now,
             end_time__gt=now
-        ).order_by('-start_time')
+        ).order_by('-start_time'))
+
+    def cache_timeout(self, polls):
+        """Seconds to cache the list of the active ``polls``.
+
+        Polls open and close as the clock passes their start and end times,
+        which no signal sees, so the TTL is cut short at the next opening
+        or closing.
+        """
+        now = timezone.now()
+        boundaries = [poll.end_time for poll in polls]
+        next_start = Poll.objects.filter(start_time__gt=now).order_by(
+            'start_time'
+        ).values_list('start_time', flat=True).first()
+        if next_start is not None:
+            boundaries.append(next_start)
+        if not boundaries:
+            return settings.ACTIVE_POLLS_CACHE_TTL
+        # 0 leaves the list uncached if a boundary has just passed
+        seconds = math.ceil((min(boundaries) - now).total_seconds())
+        return max(0, min(settings.ACTIVE_POLLS_CACHE_TTL, seconds))
+
+    def list(self, request, *args, **kwargs):
+        # The active poll list is the same for every user, so serialize it
+        # once per TTL and paginate the cached list
+        data = cache.get(self.cache_key)
+        if data is None:
+            polls = list(self.get_queryset())
+            data = self.get_serializer(polls, many=True).data
+            cache.set(self.cache_key, data, self.cache_timeout(polls))
+
+        page = self.paginate_queryset(data)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(data)
@@ -11,11 +11,8 @@ class ChaguapollConfig(AppConfig):
         Called when Django starts up.
         This is where you can register signals, perform initialization, etc.
         """
-        # Import signals if you have any
-        try:
-            import chaguapoll
-        except ImportError:
-            pass
+        # Import signals to register them
+        import chaguapoll.signals
         
         # You can add any other initialization code here
         # For example, registering custom checks, etc.
\ No newline at end of file
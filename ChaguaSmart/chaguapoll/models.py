@@ -11,7 +11,8 @@ class Poll(models.Model):
     description = models.TextField()
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_polls')
+    # polls.Poll already uses created_polls for the reverse accessor
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_chaguapoll_polls')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -29,6 +30,14 @@ class Poll(models.Model):
         ordering = ['-created_at']
         verbose_name = "Poll"
         verbose_name_plural = "Polls"
+        indexes = [
+            # Newest-first cursor pagination (polls.pagination)
+            models.Index(fields=['-created_at', '-id']),
+            # Active polls (start_time <= now < end_time) newest start first,
+            # scanned backwards. Activity depends on the current time, so it
+            # cannot be a partial index condition.
+            models.Index(fields=['start_time', 'end_time']),
+        ]
     
     def __str__(self):
         return self.title
@@ -120,7 +129,8 @@ class Vote(models.Model):
         verbose_name_plural = "Votes"
         indexes = [
             models.Index(fields=['voted_at']),
-            models.Index(fields=['user', 'voted_at']),
+            # A user's vote history, newest first (polls.pagination)
+            models.Index(fields=['user', '-voted_at', '-id']),
         ]
     
     def __str__(self):
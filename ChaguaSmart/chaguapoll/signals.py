@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.core.cache import cache
+
+from .api.views import ActivePollsAPIView
+from .models import Poll, Option
+
+
+@receiver([post_save, post_delete], sender=Poll)
+def poll_changed(sender, instance, **kwargs):
+    """Invalidate the cached active poll list when a poll changes"""
+    cache.delete(ActivePollsAPIView.cache_key)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    """Options are embedded in the active poll list, so invalidate it too"""
+    cache.delete(ActivePollsAPIView.cache_key)
@@ -1,11 +1,17 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+import re
 from datetime import timedelta
+from .api.views import ActivePollsAPIView
 from .models import Poll, Option, Vote
 
 User = get_user_model()
@@ -103,7 +109,7 @@ class PollAPITest(APITestCase):
         return str(refresh.access_token)
 
     def test_poll_list_unauthenticated(self):
-        url = reverse('poll-list')
+        url = reverse('chaguapoll:poll-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
@@ -111,16 +117,21 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('poll-list')
+        url = reverse('chaguapoll:poll-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        # Paginated: PageNumberPagination envelope
+        self.assertEqual(set(response.data), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.poll.id)
 
     def test_poll_create_admin(self):
         token = self.get_jwt_token(self.admin_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('poll-list')
+        url = reverse('chaguapoll:poll-list')
         data = {
             'title': 'New Poll',
             'description': 'New Description',
@@ -137,7 +148,7 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('poll-list')
+        url = reverse('chaguapoll:poll-list')
         data = {
             'title': 'New Poll',
             'description': 'New Description',
@@ -152,7 +163,7 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('vote-create')
+        url = reverse('chaguapoll:vote-create')
         data = {'option': self.option1.id}
         
         response = self.client.post(url, data, format='json')
@@ -166,7 +177,7 @@ class PollAPITest(APITestCase):
         # Create first vote
         Vote.objects.create(user=self.regular_user, option=self.option1)
         
-        url = reverse('vote-create')
+        url = reverse('chaguapoll:vote-create')
         data = {'option': self.option2.id}  # Try to vote on same poll
         
         response = self.client.post(url, data, format='json')
@@ -180,7 +191,7 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('poll-results', kwargs={'pk': self.poll.pk})
+        url = reverse('chaguapoll:poll-results', kwargs={'pk': self.poll.pk})
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -200,7 +211,7 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('active-polls')
+        url = reverse('chaguapoll:active-polls')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -208,6 +219,22 @@ class PollAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['id'], self.poll.id)
 
+    def test_active_polls_cache_expires_when_a_poll_opens_or_closes(self):
+        view = ActivePollsAPIView()
+        now = timezone.now()
+        closing = Poll.objects.create(
+            title='Closing Poll', description='Closing', created_by=self.admin_user,
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(seconds=10),
+        )
+        self.assertLessEqual(view.cache_timeout([self.poll, closing]), 10)
+
+        closing.delete()
+        Poll.objects.create(
+            title='Opening Poll', description='Opening', created_by=self.admin_user,
+            start_time=now + timedelta(seconds=5), end_time=now + timedelta(days=1),
+        )
+        self.assertLessEqual(view.cache_timeout([self.poll]), 5)
+
     def test_user_votes_list(self):
         # Create vote
         Vote.objects.create(user=self.regular_user, option=self.option1)
@@ -215,17 +242,20 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('user-votes')
+        url = reverse('chaguapoll:user-votes')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        # Paginated: VoteCursorPagination envelope, no count
+        self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_close_poll_permission(self):
         token = self.get_jwt_token(self.admin_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('poll-close-poll', kwargs={'pk': self.poll.pk})
+        url = reverse('chaguapoll:poll-close-poll', kwargs={'pk': self.poll.pk})
         response = self.client.post(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -252,7 +282,7 @@ class PollAPITest(APITestCase):
         token = self.get_jwt_token(self.regular_user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         
-        url = reverse('vote-create')
+        url = reverse('chaguapoll:vote-create')
         data = {'option': expired_option.id}
         
         response = self.client.post(url, data, format='json')
@@ -260,6 +290,35 @@ class PollAPITest(APITestCase):
         self.assertIn('ended', response.data['detail'])
 
 
+    def test_poll_list_query_count_is_constant(self):
+        voters = [
+            User.objects.create_user(username=f'voter{j}', password='voterpass123')
+            for j in range(3)
+        ]
+        for i in range(5):
+            poll = Poll.objects.create(
+                title=f'Extra Poll {i}',
+                description='Extra',
+                start_time=timezone.now(),
+                end_time=timezone.now() + timedelta(days=1),
+                created_by=self.admin_user
+            )
+            for j in range(3):
+                option = Option.objects.create(poll=poll, option_text=f'Choice {j}')
+                Vote.objects.create(user=voters[j], option=option)
+
+        self.client.force_authenticate(self.regular_user)
+        url = reverse('chaguapoll:poll-list')
+
+        # Count, polls page with creators and totals, options with counts
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        polls = {poll['title']: poll for poll in response.data['results']}
+        self.assertEqual(polls['Extra Poll 0']['total_votes'], 3)
+        self.assertEqual(polls['Extra Poll 0']['options'][0]['vote_count'], 1)
+
 class VoteModelTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -302,4 +361,148 @@ class VoteModelTest(TestCase):
         self.assertFalse(Option.objects.filter(id=self.option.id).exists())
 
 
-# Run tests with: python manage.py test chaguapoll.tests
\ No newline at end of file
+# Run tests with: python manage.py test chaguapoll.tests
+
+class QueryBudgetTest(APITestCase):
+    """Query budgets for the read endpoints; they must not grow with the data"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            password='adminpass123',
+            campus='Admin Campus',
+            is_admin=True
+        )
+        voters = [
+            User.objects.create_user(username=f'voter{i}', password='voterpass123')
+            for i in range(4)
+        ]
+        for i in range(10):
+            poll = Poll.objects.create(
+                title=f'Budget Poll {i}',
+                description='Budget',
+                start_time=timezone.now() - timedelta(hours=1),
+                end_time=timezone.now() + timedelta(days=1),
+                created_by=self.admin_user
+            )
+            options = [
+                Option.objects.create(poll=poll, option_text=f'Choice {j}')
+                for j in range(4)
+            ]
+            for j, voter in enumerate(voters):
+                Vote.objects.create(user=voter, option=options[j])
+        self.poll = poll
+        self.voter = voters[0]
+        self.client.force_authenticate(self.voter)
+
+    def assert_budget(self, url, max_queries):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), max_queries, [q['sql'] for q in queries])
+
+    def test_poll_list(self):
+        self.assert_budget(reverse('chaguapoll:poll-list'), 3)
+
+    def test_poll_detail(self):
+        self.assert_budget(reverse('chaguapoll:poll-detail', kwargs={'pk': self.poll.pk}), 2)
+
+    def test_poll_results(self):
+        self.assert_budget(reverse('chaguapoll:poll-results', kwargs={'pk': self.poll.pk}), 2)
+
+    def test_active_polls(self):
+        # The list, its options, and the next opening for the cache timeout
+        self.assert_budget(reverse('chaguapoll:active-polls'), 3)
+
+    def test_user_votes(self):
+        # Cursor pagination: no COUNT(*) query
+        self.assert_budget(reverse('chaguapoll:user-votes'), 1)
+
+    def test_user_votes_cursor_walks_every_vote_once(self):
+        url = reverse('chaguapoll:user-votes') + '?page_size=3'
+        seen = []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen.extend(vote['id'] for vote in response.data['results'])
+            url = response.data['next']
+
+        expected = list(
+            Vote.objects.filter(user=self.voter)
+            .order_by('-voted_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+
+class QueryPlanTest(TestCase):
+    """Fail if the active-poll queries stop using the (start_time, end_time) index"""
+
+    def full_table_scans(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return [line for line in queryset.explain().splitlines() if 'Seq Scan' in line]
+        return [line for line in queryset.explain().splitlines() if re.search(r'\bSCAN \S+$', line)]
+
+    def test_active_polls(self):
+        now = timezone.now()
+        queryset = Poll.objects.filter(start_time__lte=now, end_time__gt=now).order_by('-start_time')
+        self.assertEqual(self.full_table_scans(queryset), [], queryset.explain())
+
+    def test_next_opening(self):
+        queryset = Poll.objects.filter(start_time__gt=timezone.now()).order_by('start_time')
+        self.assertEqual(self.full_table_scans(queryset), [], queryset.explain())
+
+    def test_open_polls(self):
+        queryset = Poll.objects.filter(end_time__gt=timezone.now()).order_by('-start_time')
+        self.assertEqual(self.full_table_scans(queryset), [], queryset.explain())
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+        'poll_vote': '1/min',
+    },
+})
+class VoteThrottleTest(APITestCase):
+    """votes/ only sends the option, so the per-poll throttle finds the poll from it"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='voter', password='pass123', campus='Main')
+        self.polls = [
+            Poll.objects.create(
+                title=f'Poll {i}', description='Throttled', created_by=self.user,
+                start_time=timezone.now(), end_time=timezone.now() + timedelta(days=1),
+            )
+            for i in range(2)
+        ]
+        self.options = [
+            Option.objects.create(poll=poll, option_text=f'Option {i}')
+            for poll in self.polls for i in range(2)
+        ]
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def vote(self, option):
+        return self.client.post(reverse('chaguapoll:vote-create'), {'option': option.id}, format='json')
+
+    def test_repeat_vote_on_a_poll_throttled_without_queries(self):
+        self.assertEqual(self.vote(self.options[0]).status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            response = self.vote(self.options[0])
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Another option of the same poll only costs looking up its poll
+        with self.assertNumQueries(1):
+            response = self.vote(self.options[1])
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttle_is_per_poll(self):
+        self.vote(self.options[0])
+
+        self.assertEqual(self.vote(self.options[2]).status_code, status.HTTP_201_CREATED)
@@ -15,7 +15,9 @@ def main():
         pass
 
     
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # Tests run with the fast password hasher profile
+    default_settings = 'config.settings_test' if sys.argv[1:2] == ['test'] else 'config.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     
     try:
         from django.core.management import execute_from_command_line
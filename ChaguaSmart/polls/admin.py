@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.utils import timezone  
 from .models import Poll, Option, Vote
+from .snapshots import take_snapshots
 
 
 @admin.register(Poll)
 class PollAdmin(admin.ModelAdmin):
-    list_display = ['title', 'created_by', 'is_active']
+    list_display = ['title', 'created_by', 'is_active', 'total_votes']
     list_filter = ['is_active']
     search_fields = ['title', 'description']
 
@@ -13,7 +14,7 @@ class PollAdmin(admin.ModelAdmin):
 @admin.register(Option)
 class OptionAdmin(admin.ModelAdmin):
     # The field might be 'text' instead of 'option_text'
-    list_display = ['poll', 'text']  
+    list_display = ['poll', 'text', 'vote_count']
     list_filter = ['poll']
     search_fields = ['text', 'poll__title']  
 
@@ -36,7 +37,9 @@ admin.site.index_title = "Polling System Management"
 @admin.action(description='Close selected polls')
 def close_polls(modeladmin, request, queryset):
     """Close selected polls by setting end_time to now"""
-    updated = queryset.update(end_time=timezone.now())
+    poll_ids = list(queryset.values_list('id', flat=True))
+    updated = queryset.update(end_time=timezone.now(), is_active=False)
+    take_snapshots(poll_ids)
     modeladmin.message_user(
         request,
         f'{updated} poll(s) were successfully closed.'
@@ -47,7 +50,7 @@ def close_polls(modeladmin, request, queryset):
 def activate_polls(modeladmin, request, queryset):
     """Activate selected polls by setting start_time to now"""
     now = timezone.now()
-    updated = queryset.filter(start_time__gt=now).update(start_time=now)
+    updated = queryset.filter(start_time__gt=now).update(start_time=now, is_active=True)
     modeladmin.message_user(
         request,
         f'{updated} poll(s) were successfully activated.'
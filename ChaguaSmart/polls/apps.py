@@ -7,4 +7,5 @@ class PollsConfig(AppConfig):
 
     def ready(self):
         # Import signals to register them
-        import polls.signals
\ No newline at end of file
+        import polls.signals
+        import polls.checks  # noqa: F401
@@ -0,0 +1,371 @@
+import asyncio
+import statistics
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from chaguapoll.api.views import ActivePollsAPIView
+from chaguapoll.models import Poll as ChaguaPoll, Option as ChaguaOption
+from users.authentication import CampusRefreshToken
+
+from .broadcast import results_group_name
+from .cache import poll_detail_key, poll_results_key
+from .models import Poll, Option
+from .seeding import BENCHMARK_PASSWORD
+
+User = get_user_model()
+
+
+# ``build(ctx, i)`` returns the URL and request body for iteration ``i``;
+# ``max_queries`` is the budget for the slowest (cold cache) request and
+# ``auth`` whose token to send: None, 'voter' (a different user each
+# iteration) or 'admin'
+Endpoint = namedtuple('Endpoint', 'name method max_queries auth build')
+
+
+def _url(name, key=None):
+    """Build ``name`` for the poll ``ctx[key]``, or per iteration when the
+    context holds a list"""
+    def build(ctx, i):
+        if key is None:
+            return reverse(name), None
+        poll = ctx[key][i] if isinstance(ctx[key], list) else ctx[key]
+        return reverse(name, kwargs={'pk': poll.id}), None
+    return build
+
+
+def _with_data(build, data):
+    return lambda ctx, i: (build(ctx, i)[0], data(ctx, i))
+
+
+def _new_poll_data(ctx, i):
+    now = timezone.now()
+    return {
+        'title': f'Benchmark Poll {i}',
+        'description': 'Created by the benchmark',
+        'start_time': now.isoformat(),
+        'end_time': (now + timezone.timedelta(days=1)).isoformat(),
+        'options': ['Yes', 'No'],
+    }
+
+
+ENDPOINTS = [
+    # polls.urls
+    Endpoint('polls:polls-list', 'get', 2, None, _url('polls:polls-list')),
+    Endpoint('polls:polls-create', 'post', 3, 'voter',
+             _with_data(_url('polls:polls-list'), _new_poll_data)),
+    Endpoint('polls:polls-detail', 'get', 2, None, _url('polls:polls-detail', 'poll')),
+    Endpoint('polls:polls-update', 'put', 6, 'voter',
+             _with_data(_url('polls:polls-detail', 'own_polls'), lambda ctx, i: {
+                 'title': f'Benchmark Poll {i} (edited)',
+                 'description': 'Edited by the benchmark',
+                 'options': [ctx['own_options'][i].id],
+             })),
+    Endpoint('polls:polls-partial-update', 'patch', 4, 'voter',
+             _with_data(_url('polls:polls-detail', 'own_polls'),
+                        lambda ctx, i: {'title': f'Benchmark Poll {i} (patched)'})),
+    Endpoint('polls:polls-results', 'get', 2, None, _url('polls:polls-results', 'poll')),
+    Endpoint('polls:polls-export', 'get', 3, 'admin', _url('polls:polls-export', 'poll')),
+    # Both vote endpoints insert, and update the counters, in a savepoint;
+    # see polls.voting.create_vote
+    Endpoint('polls:polls-vote', 'post', 12, 'voter',
+             _with_data(_url('polls:polls-vote', 'vote_poll'),
+                        lambda ctx, i: {'option': ctx['vote_option'].id})),
+    Endpoint('polls:polls-cast-vote', 'post', 12, 'voter',
+             _with_data(_url('polls:polls-cast-vote', 'open_poll'),
+                        lambda ctx, i: {'option_id': ctx['open_option'].id})),
+    # Includes reading the snapshot back for the poll.closed broadcast
+    Endpoint('polls:polls-close-poll', 'post', 7, 'voter',
+             _url('polls:polls-close-poll', 'own_polls')),
+    Endpoint('polls:polls-destroy', 'delete', 7, 'voter',
+             _url('polls:polls-detail', 'own_polls')),
+    # chaguapoll.api.urls; writes are for admins
+    Endpoint('chaguapoll:poll-list', 'get', 3, 'voter', _url('chaguapoll:poll-list')),
+    Endpoint('chaguapoll:poll-create', 'post', 3, 'admin',
+             _with_data(_url('chaguapoll:poll-list'), _new_poll_data)),
+    Endpoint('chaguapoll:poll-detail', 'get', 2, 'voter',
+             _url('chaguapoll:poll-detail', 'chagua_poll')),
+    Endpoint('chaguapoll:poll-update', 'put', 5, 'admin',
+             _with_data(_url('chaguapoll:poll-detail', 'chagua_edit_polls'), lambda ctx, i: {
+                 'title': f'Benchmark Poll {i} (edited)',
+                 'description': 'Edited by the benchmark',
+                 'start_time': ctx['chagua_edit_polls'][i].start_time.isoformat(),
+                 'end_time': ctx['chagua_edit_polls'][i].end_time.isoformat(),
+             })),
+    Endpoint('chaguapoll:poll-active', 'get', 2, 'voter', _url('chaguapoll:poll-active')),
+    # Shadowed by the router's polls/active/ route, so this is poll-active too
+    Endpoint('chaguapoll:active-polls', 'get', 2, 'voter', _url('chaguapoll:active-polls')),
+    Endpoint('chaguapoll:poll-results', 'get', 2, 'voter',
+             _url('chaguapoll:poll-results', 'chagua_poll')),
+    # Plus the option's poll for the per-poll throttle, until it is cached
+    Endpoint('chaguapoll:vote-create', 'post', 9, 'voter',
+             _with_data(_url('chaguapoll:vote-create'),
+                        lambda ctx, i: {'option': ctx['chagua_option'].id})),
+    Endpoint('chaguapoll:poll-vote', 'post', 8, 'voter',
+             _with_data(_url('chaguapoll:poll-vote', 'chagua_vote_poll'),
+                        lambda ctx, i: {'option': ctx['chagua_vote_option'].id})),
+    Endpoint('chaguapoll:user-votes', 'get', 2, 'voter', _url('chaguapoll:user-votes')),
+    Endpoint('chaguapoll:poll-close-poll', 'post', 3, 'admin',
+             _url('chaguapoll:poll-close-poll', 'chagua_close_polls')),
+    Endpoint('chaguapoll:close-poll', 'post', 3, 'admin',
+             _url('chaguapoll:close-poll', 'chagua_edit_polls')),
+    Endpoint('chaguapoll:poll-destroy', 'delete', 7, 'admin',
+             _url('chaguapoll:poll-detail', 'chagua_delete_polls')),
+    # users.urls
+    Endpoint('users:api-root', 'get', 1, 'voter', _url('users:api-root')),
+    Endpoint('users:register', 'post', 2, None,
+             _with_data(_url('users:register'), lambda ctx, i: {
+                 'username': f'bench_register{i}',
+                 'email': f'bench_register{i}@chaguasmart.com',
+                 'password': 'Bench-pass-123',
+             })),
+    Endpoint('users:roster-import', 'post', 4, 'admin',
+             _with_data(_url('users:roster-import'), lambda ctx, i: [
+                 {'username': f'bench_roster{i}_{n}', 'password': 'Bench-pass-123'}
+                 for n in range(10)
+             ])),
+    Endpoint('users:token_obtain_pair', 'post', 1, None,
+             _with_data(_url('users:token_obtain_pair'), lambda ctx, i: {
+                 'username': ctx['voters'][i].username,
+                 'password': BENCHMARK_PASSWORD,
+             })),
+    Endpoint('users:token_refresh', 'post', 1, None,
+             _with_data(_url('users:token_refresh'), lambda ctx, i: {'refresh': ctx['refresh']})),
+]
+
+EndpointResult = namedtuple(
+    'EndpointResult', 'name max_queries budget p50_ms p95_ms statuses'
+)
+
+
+def _percentile(timings, pct):
+    if len(timings) < 2:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[pct - 1]
+
+
+def run_endpoint_benchmarks(iterations=20, endpoints=ENDPOINTS):
+    """Request every endpoint ``iterations`` times against the current data.
+
+    Each request runs as a different seeded user (or as one benchmark admin)
+    from a different address, on polls created for it where it edits or
+    deletes one, so write endpoints and throttles do not trip over earlier
+    requests. Everything runs in a transaction
+    that is rolled back afterwards, so the database is left untouched.
+    Returns one ``EndpointResult`` per endpoint.
+    """
+    host = _benchmark_host()
+    results = []
+
+    with transaction.atomic():
+        ctx = _build_context(iterations)
+        for endpoint in endpoints:
+            results.append(_benchmark(endpoint, ctx, iterations, host))
+        transaction.set_rollback(True)
+
+    return results
+
+
+def _benchmark_host():
+    return next((h for h in settings.ALLOWED_HOSTS if h not in ('*', '')), 'testserver')
+
+
+def _build_context(iterations):
+    poll = Poll.objects.filter(options__isnull=False).order_by('id').first()
+    if poll is None:
+        raise ValueError("No polls to benchmark; seed data first")
+    # Budgets are for the cold path, so start without cached payloads
+    cache.delete_many([poll_detail_key(poll.id), poll_results_key(poll.id)])
+    cache.delete(ActivePollsAPIView.cache_key)
+
+    voters = list(User.objects.filter(is_superuser=False).order_by('id')[:iterations])
+    if len(voters) < iterations:
+        raise ValueError(f"Need at least {iterations} users to benchmark")
+    admin = User.objects.create(
+        username='bench_admin', email='bench_admin@chaguasmart.com',
+        is_admin=True, is_staff=True
+    )
+
+    # Fresh polls nobody has voted on yet for the vote endpoints, and one
+    # poll per iteration for the endpoints that edit, close or delete it
+    now = timezone.now()
+    window = {'start_time': now, 'end_time': now + timezone.timedelta(days=1)}
+
+    def open_poll(model, option_model, title, created_by, text_field):
+        poll = model.objects.create(
+            title=title, description='', created_by=created_by, **window
+        )
+        return poll, option_model.objects.create(poll=poll, **{text_field: 'Benchmark Option'})
+
+    def polls_poll(title, created_by=voters[0]):
+        return open_poll(Poll, Option, title, created_by, 'text')
+
+    def chagua_poll(title):
+        return open_poll(ChaguaPoll, ChaguaOption, title, admin, 'option_text')
+
+    open_poll_, open_option = polls_poll('Benchmark Open Poll')
+    vote_poll, vote_option = polls_poll('Benchmark Vote Poll')
+    own = [polls_poll(f'Benchmark Own Poll {i}', voters[i]) for i in range(iterations)]
+    chagua_poll_, chagua_option = chagua_poll('Benchmark Poll')
+    chagua_vote_poll, chagua_vote_option = chagua_poll('Benchmark Vote Poll')
+
+    return {
+        'poll': poll,
+        'open_poll': open_poll_,
+        'open_option': open_option,
+        'vote_poll': vote_poll,
+        'vote_option': vote_option,
+        'own_polls': [poll for poll, _ in own],
+        'own_options': [option for _, option in own],
+        'chagua_poll': chagua_poll_,
+        'chagua_option': chagua_option,
+        'chagua_vote_poll': chagua_vote_poll,
+        'chagua_vote_option': chagua_vote_option,
+        'chagua_edit_polls': [chagua_poll(f'Edit {i}')[0] for i in range(iterations)],
+        'chagua_close_polls': [chagua_poll(f'Close {i}')[0] for i in range(iterations)],
+        'chagua_delete_polls': [chagua_poll(f'Delete {i}')[0] for i in range(iterations)],
+        'voters': voters,
+        'admin': admin,
+        'refresh': str(CampusRefreshToken.for_user(voters[0])),
+    }
+
+
+def _benchmark(endpoint, ctx, iterations, host):
+    timings = []
+    max_queries = 0
+    statuses = set()
+
+    for i in range(iterations):
+        # A distinct address per iteration, like separate clients, so the
+        # per-IP throttles measure the endpoint rather than reject it
+        client = Client(HTTP_HOST=host, REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+        if endpoint.auth is not None:
+            user = ctx['admin'] if endpoint.auth == 'admin' else ctx['voters'][i]
+            token = CampusRefreshToken.for_user(user).access_token
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        url, data = endpoint.build(ctx, i)
+        send = getattr(client, endpoint.method)
+
+        # Safe-method requests read from the replica when one is configured
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in connections
+            ]
+            start = time.perf_counter()
+            if data is None:
+                response = send(url, secure=True)
+            else:
+                response = send(url, data, content_type='application/json', secure=True)
+            if response.streaming:
+                # Exports read their rows while the body is consumed
+                b''.join(response.streaming_content)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        max_queries = max(max_queries, sum(len(queries) for queries in captured))
+        statuses.add(response.status_code)
+
+    return EndpointResult(
+        name=endpoint.name,
+        max_queries=max_queries,
+        budget=endpoint.max_queries,
+        p50_ms=_percentile(timings, 50),
+        p95_ms=_percentile(timings, 95),
+        statuses=sorted(statuses),
+    )
+
+
+SubscriberResult = namedtuple(
+    'SubscriberResult',
+    'subscribers connected connect_p50_ms connect_p95_ms fanout_p50_ms fanout_p95_ms delivered expected',
+)
+
+
+def run_subscriber_benchmark(levels=(100, 500, 1000), broadcasts=20, timeout=10):
+    """Measure how many live results subscribers one worker sustains.
+
+    For each level, that many WebSocket clients connect at once to the
+    results of one poll, all served by ``config.asgi.application`` on this
+    process's event loop, as a single uvicorn worker would hold them. Then
+    ``broadcasts`` result deltas are sent to the poll's group one after
+    another, each timed until every subscriber has received it. Messages go
+    through the configured channel layer. Returns one ``SubscriberResult``
+    per level.
+    """
+    poll = Poll.objects.filter(options__isnull=False).order_by('id').first()
+    if poll is None:
+        raise ValueError("No polls to benchmark; seed data first")
+    return [
+        async_to_sync(_benchmark_subscribers)(poll.id, subscribers, broadcasts, timeout)
+        for subscribers in levels
+    ]
+
+
+async def _benchmark_subscribers(poll_id, subscribers, broadcasts, timeout):
+    # Imported here as the ASGI module sets up Django and loads the routing
+    from channels.testing import WebsocketCommunicator
+    from config.asgi import application
+
+    host = _benchmark_host()
+    path = f'/ws/results/{poll_id}/'
+    headers = [(b'host', host.encode()), (b'origin', f'https://{host}'.encode())]
+
+    async def subscribe():
+        communicator = WebsocketCommunicator(application, path, headers=headers)
+        start = time.perf_counter()
+        try:
+            connected, _ = await communicator.connect(timeout=timeout)
+            if connected:
+                # The initial results payload
+                await communicator.receive_from(timeout=timeout)
+        except asyncio.TimeoutError:
+            connected = False
+        return communicator, connected, (time.perf_counter() - start) * 1000
+
+    subscriptions = await asyncio.gather(*(subscribe() for _ in range(subscribers)))
+    live = [communicator for communicator, connected, _ in subscriptions if connected]
+    connect_timings = [elapsed for _, connected, elapsed in subscriptions if connected]
+
+    channel_layer = get_channel_layer()
+    fanout_timings = []
+    delivered = 0
+    for _ in range(broadcasts if live else 0):
+        start = time.perf_counter()
+        await channel_layer.group_send(results_group_name(poll_id), {
+            'type': 'results.delta',
+            'poll_id': poll_id,
+            'deltas': {},
+            'total_votes_delta': 0,
+        })
+        received = await asyncio.gather(
+            *(communicator.receive_from(timeout=timeout) for communicator in live),
+            return_exceptions=True,
+        )
+        fanout_timings.append((time.perf_counter() - start) * 1000)
+        delivered += sum(not isinstance(message, BaseException) for message in received)
+
+    await asyncio.gather(
+        *(communicator.disconnect() for communicator in live), return_exceptions=True
+    )
+
+    return SubscriberResult(
+        subscribers=subscribers,
+        connected=len(live),
+        connect_p50_ms=_percentile(connect_timings, 50) if connect_timings else None,
+        connect_p95_ms=_percentile(connect_timings, 95) if connect_timings else None,
+        fanout_p50_ms=_percentile(fanout_timings, 50) if fanout_timings else None,
+        fanout_p95_ms=_percentile(fanout_timings, 95) if fanout_timings else None,
+        delivered=delivered,
+        expected=subscribers * broadcasts,
+    )
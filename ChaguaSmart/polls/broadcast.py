@@ -0,0 +1,88 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+except ImportError:
+    get_channel_layer = None
+
+logger = logging.getLogger(__name__)
+
+
+def results_group_name(poll_id):
+    """Name of the channel layer group ResultsConsumer joins for a poll"""
+    return f'results_{poll_id}'
+
+
+def send_to_results_group(poll_id, message):
+    """Send a message to every ResultsConsumer watching a poll"""
+    channel_layer = get_channel_layer() if get_channel_layer else None
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(results_group_name(poll_id), message)
+
+
+class ResultsDeltaBroadcaster:
+    """Coalesce per-option vote deltas into rate-limited group broadcasts.
+
+    The first delta recorded for a poll schedules a flush one interval later;
+    deltas recorded in the meantime are summed into that same broadcast, so
+    each poll gets at most ``RESULTS_BROADCASTS_PER_SECOND`` messages per
+    second no matter how many votes arrive.
+    """
+
+    def __init__(self, send=send_to_results_group, max_per_second=None):
+        self._send = send
+        self._max_per_second = max_per_second
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._timers = {}
+
+    @property
+    def interval(self):
+        max_per_second = self._max_per_second or settings.RESULTS_BROADCASTS_PER_SECOND
+        return 1.0 / max_per_second
+
+    def record(self, poll_id, option_id, delta):
+        with self._lock:
+            self._pending[poll_id][option_id] += delta
+            if poll_id in self._timers:
+                return
+            timer = threading.Timer(self.interval, self.flush, args=(poll_id,))
+            timer.daemon = True
+            self._timers[poll_id] = timer
+        timer.start()
+
+    def flush(self, poll_id):
+        with self._lock:
+            timer = self._timers.pop(poll_id, None)
+            deltas = self._pending.pop(poll_id, None)
+        if timer is not None:
+            timer.cancel()
+
+        deltas = {str(option_id): delta for option_id, delta in (deltas or {}).items() if delta}
+        if not deltas:
+            return
+
+        try:
+            self._send(poll_id, {
+                'type': 'results.delta',
+                'poll_id': poll_id,
+                'deltas': deltas,
+                'total_votes_delta': sum(deltas.values()),
+            })
+        except Exception:
+            logger.exception("Failed to broadcast result deltas for poll %s", poll_id)
+
+
+broadcaster = ResultsDeltaBroadcaster()
+
+
+def publish_vote_delta(poll_id, option_id, delta):
+    """Queue a vote delta for broadcast once the current transaction commits"""
+    transaction.on_commit(lambda: broadcaster.record(poll_id, option_id, delta))
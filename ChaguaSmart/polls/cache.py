@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Poll
+from .serializers import PollSerializer
+
+
+# Cache keys; polls/signals.py deletes these whenever the underlying rows change
+def poll_detail_key(poll_id):
+    return f'poll_{poll_id}'
+
+
+def poll_results_key(poll_id):
+    return f'poll_{poll_id}_results'
+
+
+def get_poll_results(poll_id, poll=None):
+    """Return a poll's results, computing and caching them on a miss.
+
+    Views pass the ``poll`` they loaded with ``get_object``, so the 404 and
+    permission checks run whether or not the results are cached; it should
+    have its ``result_snapshot`` selected so ended polls cost no extra query.
+    Without it the poll is loaded on a miss.
+    """
+    key = poll_results_key(poll_id)
+    results = cache.get(key)
+    if results is None:
+        if poll is None:
+            poll = Poll.objects.select_related('result_snapshot').get(pk=poll_id)
+        results = poll.get_results()
+        cache.set(key, results, settings.POLL_RESULTS_CACHE_TTL)
+    return results
+
+
+def get_poll_detail(poll_id, poll=None):
+    """Return the serialized poll detail, computing and caching it on a miss.
+
+    ``poll`` is the instance the view already loaded, as for
+    ``get_poll_results``.
+    """
+    key = poll_detail_key(poll_id)
+    data = cache.get(key)
+    if data is None:
+        if poll is None:
+            poll = Poll.objects.get(pk=poll_id)
+        data = PollSerializer(poll).data
+        cache.set(key, data, settings.POLL_DETAIL_CACHE_TTL)
+    return data
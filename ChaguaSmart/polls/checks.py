@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from config.checks import cache_is_atomic
+
+
+@register()
+def check_buffered_vote_cache(app_configs, **kwargs):
+    """Buffered ingestion rejects duplicate votes with cache.add, which is
+    only safe on Redis or Memcached"""
+    if settings.VOTE_INGESTION_MODE != 'buffered' or cache_is_atomic():
+        return []
+    return [Error(
+        "VOTE_INGESTION_MODE='buffered' needs a Redis or Memcached cache.",
+        hint=(
+            "Duplicate votes are rejected with cache.add(), which other backends "
+            "do not perform atomically across workers, and culled keys let "
+            "duplicates through. Set CACHE_BACKEND to Redis or Memcached, or use "
+            "VOTE_INGESTION_MODE='direct'."
+        ),
+        id='polls.E001',
+    )]
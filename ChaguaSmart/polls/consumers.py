@@ -1,25 +1,58 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from config.db_routers import use_replica
+from .broadcast import results_group_name
+from .cache import get_poll_results
 from .models import Poll
 
 class ResultsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.poll_id = self.scope['url_route']['kwargs']['poll_id']
-        self.room_group_name = f'results_{self.poll_id}'
+        self.room_group_name = results_group_name(self.poll_id)
         
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        await self.accept()
         
-        # Send initial results
+        # Send initial results, refusing the handshake for unknown polls
         results = await self.get_poll_results(self.poll_id)
+        if results is None:
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            await self.close()
+            return
+        await self.accept()
         await self.send(text_data=json.dumps(results))
     
+    async def disconnect(self, close_code):
+        # Leave room group
+        await self.channel_layer.group_discard(
+            self.room_group_name,
+            self.channel_name
+        )
+
+    async def results_delta(self, event):
+        """Forward a coalesced per-option vote delta to the client"""
+        await self.send(text_data=json.dumps(event))
+
+    async def poll_opened(self, event):
+        """Tell the client the poll has opened for voting"""
+        await self.send(text_data=json.dumps(event))
+
+    async def poll_closed(self, event):
+        """Send the final results, as broadcast with the event"""
+        if event.get('results') is None:
+            # Sent without them; read the poll's snapshot
+            event = {**event, 'results': await self.get_poll_results(event['poll_id'])}
+        await self.send(text_data=json.dumps(event))
+
     @database_sync_to_async
     def get_poll_results(self, poll_id):
-        poll = Poll.objects.get(id=poll_id)
-        return poll.get_results()
\ No newline at end of file
+        # Subscribers only read, so spare the primary
+        with use_replica():
+            try:
+                return get_poll_results(poll_id)
+            except Poll.DoesNotExist:
+                return None
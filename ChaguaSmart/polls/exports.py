@@ -0,0 +1,67 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Vote
+
+VOTE_EXPORT_FIELDS = ('vote_id', 'user_id', 'username', 'option_id', 'option', 'voted_at')
+RESULT_EXPORT_FIELDS = ('option_id', 'option', 'votes', 'percentage')
+
+
+def iter_vote_rows(poll_id, chunk_size=None):
+    """Iterate over the poll's votes as tuples in ``VOTE_EXPORT_FIELDS`` order.
+
+    Rows are fetched ``chunk_size`` at a time (with a server-side cursor on
+    PostgreSQL) and never turned into model instances, so memory use does
+    not grow with the number of votes.
+    """
+    return (
+        Vote.objects.filter(poll_id=poll_id)
+        .order_by('id')
+        .values_list('id', 'user_id', 'user__username', 'option_id', 'option__text', 'voted_at')
+        .iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    )
+
+
+def iter_result_rows(poll):
+    """Yield one tuple per option, in ``RESULT_EXPORT_FIELDS`` order"""
+    for option in poll.get_results()['results']:
+        yield option['option_id'], option['text'], option['votes'], option['percentage']
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(fields, rows):
+    """Yield a CSV header line followed by one line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(fields, rows):
+    """Yield one JSON object per row, newline delimited"""
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+async def aiter_in_chunks(lines, chunk_size):
+    """Serve a sync ``stream_*`` iterator to an ASGI server.
+
+    ``chunk_size`` lines at a time are pulled with ``sync_to_async``, in
+    the thread that owns the request's database connection, and sent as
+    one string; only one chunk is held in memory.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: list(islice(lines, chunk_size)))
+    while chunk := await next_chunk():
+        yield ''.join(chunk)
@@ -0,0 +1,150 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from config.batching import BatchBuffer
+
+from .broadcast import publish_vote_delta
+from .cache import poll_results_key
+from .models import Poll, Vote
+from .signals import apply_vote_count_deltas
+from .snapshots import refresh_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def has_voted_key(poll_id, user_id):
+    return f'poll_{poll_id}_voter_{user_id}'
+
+
+def voters_warmed_key(poll_id):
+    return f'poll_{poll_id}_voters_warmed'
+
+
+# States of the voters_warmed_key marker. A worker that dies while warming
+# leaves the marker at WARMING until it times out, and votes are checked
+# against the table meanwhile.
+WARMING = 'warming'
+WARM = 'warm'
+VOTERS_WARMING_TIMEOUT = 300
+
+
+class VoteBuffer(BatchBuffer):
+    """Buffered vote ingestion.
+
+    Duplicate votes are rejected synchronously in ``submit`` with an atomic
+    ``cache.add`` on a per-(poll, user) "has voted" key, so the response to
+    the voter is accurate even though the row is written later. This needs
+    Redis or Memcached (see polls.checks). Accepted votes are written with
+    ``bulk_create`` and the denormalized counters, result caches and live
+    deltas are updated once per batch. If a batch cannot be written, its
+    voters' keys are released so they can vote again.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None):
+        super().__init__(
+            flush_size or settings.VOTE_BUFFER_FLUSH_SIZE,
+            flush_interval or settings.VOTE_BUFFER_FLUSH_INTERVAL,
+        )
+
+    def submit(self, poll_id, option_id, user_id):
+        """Accept a vote for buffered insertion.
+
+        Returns False if the user has already voted on the poll.
+        """
+        if not self._warm_voters(poll_id):
+            # Another worker is still seeding the keys, so this voter's may
+            # be missing; check the table directly
+            if Vote.objects.filter(poll_id=poll_id, user_id=user_id).exists():
+                cache.set(has_voted_key(poll_id, user_id), True, settings.VOTE_HAS_VOTED_CACHE_TTL)
+                return False
+        if not cache.add(has_voted_key(poll_id, user_id), True, settings.VOTE_HAS_VOTED_CACHE_TTL):
+            return False
+        self.add((poll_id, option_id, user_id))
+        return True
+
+    def _warm_voters(self, poll_id):
+        # Seed the "has voted" keys from votes already in the database, and
+        # return whether they are all in place. The first caller marks the
+        # poll as warming and seeds it; the marker only says "warm" once
+        # seeding is done, and expires before the voter keys so they are
+        # refreshed before any of them can lapse.
+        ttl = settings.VOTE_HAS_VOTED_CACHE_TTL
+        key = voters_warmed_key(poll_id)
+        if not cache.add(key, WARMING, VOTERS_WARMING_TIMEOUT):
+            return cache.get(key) == WARM
+
+        voters = Vote.objects.filter(poll_id=poll_id).values_list('user_id', flat=True)
+        chunk = {}
+        for user_id in voters.iterator(chunk_size=2000):
+            chunk[has_voted_key(poll_id, user_id)] = True
+            if len(chunk) >= 2000:
+                cache.set_many(chunk, ttl)
+                chunk = {}
+        if chunk:
+            cache.set_many(chunk, ttl)
+        cache.set(key, WARM, ttl // 2)
+        return True
+
+    def write(self, items):
+        votes = [
+            Vote(poll_id=poll_id, option_id=option_id, user_id=user_id)
+            for poll_id, option_id, user_id in items
+        ]
+        try:
+            with transaction.atomic():
+                Vote.objects.bulk_create(votes, batch_size=self.flush_size)
+                self._record_inserted(votes)
+        except IntegrityError:
+            # A vote from before the "has voted" keys were warmed slipped
+            # through; fall back to row-by-row saves, which go through the
+            # regular signals, and drop the duplicates
+            lost = []
+            for item, vote in zip(items, votes):
+                try:
+                    with transaction.atomic():
+                        vote.save()
+                except IntegrityError:
+                    if Vote.objects.filter(poll_id=vote.poll_id, user_id=vote.user_id).exists():
+                        logger.warning(
+                            "Dropped duplicate buffered vote for poll %s by user %s",
+                            vote.poll_id, vote.user_id
+                        )
+                    else:
+                        lost.append(item)
+            if lost:
+                self.failed(lost)
+
+    def failed(self, items):
+        # The votes were accepted with a 202 but never stored; release the
+        # voters' keys so a retry is not refused as a duplicate
+        cache.delete_many([has_voted_key(poll_id, user_id) for poll_id, _, user_id in items])
+        logger.error("Dropped %d buffered vote(s); their voters can vote again", len(items))
+
+    def _record_inserted(self, votes):
+        # bulk_create skips the Vote signals, so do their work per batch
+        option_deltas = defaultdict(Counter)
+        for vote in votes:
+            option_deltas[vote.poll_id][vote.option_id] += 1
+
+        for poll_id, deltas in option_deltas.items():
+            apply_vote_count_deltas(poll_id, deltas)
+            for option_id, delta in deltas.items():
+                publish_vote_delta(poll_id, option_id, delta)
+
+        # Votes accepted before a poll closed may be flushed after its
+        # results were snapshotted
+        for poll in Poll.objects.filter(
+            pk__in=list(option_deltas), result_snapshot__isnull=False
+        ):
+            refresh_snapshot(poll)
+
+        stale_keys = [poll_results_key(poll_id) for poll_id in option_deltas]
+        stale_keys += [f'user_{vote.user_id}_votes' for vote in votes]
+        transaction.on_commit(lambda: cache.delete_many(stale_keys))
+
+
+vote_buffer = VoteBuffer()
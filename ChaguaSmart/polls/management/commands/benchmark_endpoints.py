@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.benchmarks import run_endpoint_benchmarks
+from polls.seeding import seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Measure query counts and p50/p95 latency of the API endpoints and check them against their query budgets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help="Requests per endpoint (default: 20)",
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help="Seed the benchmark dataset before measuring",
+        )
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--polls', type=int, default=200)
+        parser.add_argument('--votes', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed_benchmark_data(
+                users=options['users'], polls=options['polls'], votes=options['votes']
+            )
+            self.stdout.write("Seeded benchmark data.")
+
+        try:
+            results = run_endpoint_benchmarks(iterations=options['iterations'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            f"{'endpoint':<32} {'queries':>7} {'budget':>6} {'p50 ms':>8} {'p95 ms':>8}  status"
+        )
+        over_budget = []
+        for result in results:
+            line = (
+                f"{result.name:<32} {result.max_queries:>7} {result.budget:>6} "
+                f"{result.p50_ms:>8.2f} {result.p95_ms:>8.2f}  "
+                f"{','.join(map(str, result.statuses))}"
+            )
+            if result.max_queries > result.budget:
+                over_budget.append(result.name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if over_budget:
+            raise CommandError(f"Query budget exceeded: {', '.join(over_budget)}")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} endpoint(s) within budget."))
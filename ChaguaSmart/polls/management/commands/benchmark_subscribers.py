@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.benchmarks import run_subscriber_benchmark
+
+
+def _levels(value):
+    return [int(level) for level in value.split(',') if level]
+
+
+def _ms(value):
+    return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+
+class Command(BaseCommand):
+    help = "Measure how many concurrent live results WebSocket subscribers one worker sustains"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--levels', type=_levels, default=[100, 500, 1000],
+            help="Comma-separated subscriber counts to try (default: 100,500,1000)",
+        )
+        parser.add_argument(
+            '--broadcasts', type=int, default=20,
+            help="Result deltas sent to the subscribers at each level (default: 20)",
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=10,
+            help="Seconds to wait for a connection or message (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = run_subscriber_benchmark(
+                levels=options['levels'],
+                broadcasts=options['broadcasts'],
+                timeout=options['timeout'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            f"{'subscribers':>11} {'connected':>9} {'conn p50':>8} {'conn p95':>8} "
+            f"{'fan p50':>8} {'fan p95':>8}  delivered"
+        )
+        sustained = 0
+        for result in results:
+            line = (
+                f"{result.subscribers:>11} {result.connected:>9} "
+                f"{_ms(result.connect_p50_ms)} {_ms(result.connect_p95_ms)} "
+                f"{_ms(result.fanout_p50_ms)} {_ms(result.fanout_p95_ms)}  "
+                f"{result.delivered}/{result.expected}"
+            )
+            if result.connected == result.subscribers and result.delivered == result.expected:
+                sustained = max(sustained, result.subscribers)
+            else:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if not sustained:
+            raise CommandError("No subscriber level was sustained without losing connections or messages.")
+        self.stdout.write(self.style.SUCCESS(
+            f"One worker sustained {sustained} subscriber(s) without losing connections or messages."
+        ))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.seeding import BENCHMARK_PASSWORD, generate_load_data
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate campuses, users, polls, options and votes for load testing; safe to re-run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campuses', type=int, default=5)
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--polls', type=int, default=500)
+        parser.add_argument('--options', type=int, default=5, help="Options per poll")
+        parser.add_argument('--votes', type=int, default=1000000)
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help="Random seed; the same seed always generates the same data",
+        )
+        parser.add_argument(
+            '--prefix', default='load',
+            help="Prefix of generated usernames and poll titles (default: load)",
+        )
+        parser.add_argument(
+            '--password', default=BENCHMARK_PASSWORD,
+            help="Password shared by every generated user",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['campuses'] < 1 or options['options'] < 1:
+            raise CommandError("--campuses and --options must be at least 1")
+        if options['votes'] and not (options['users'] and options['polls']):
+            raise CommandError("Votes need at least one user and one poll")
+
+        start = time.perf_counter()
+        generate_load_data(
+            campuses=options['campuses'],
+            users=options['users'],
+            polls=options['polls'],
+            options_per_poll=options['options'],
+            votes=options['votes'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Load data ready in {time.perf_counter() - start:.1f}s."
+        ))
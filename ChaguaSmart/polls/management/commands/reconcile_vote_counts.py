@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Poll
+from polls.signals import recalculate_poll_vote_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized Option.vote_count and Poll.total_votes counters from the votes table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'poll_ids',
+            nargs='*',
+            type=int,
+            help="Only reconcile these polls (defaults to every poll)",
+        )
+
+    def handle(self, *args, **options):
+        poll_ids = options['poll_ids']
+        if not poll_ids:
+            poll_ids = list(Poll.objects.order_by('id').values_list('id', flat=True))
+
+        checked = 0
+        corrected_polls = 0
+        for poll_id in poll_ids:
+            try:
+                total_votes, corrected = recalculate_poll_vote_counts(poll_id)
+            except Poll.DoesNotExist:
+                self.stderr.write(f"Poll {poll_id} does not exist, skipping")
+                continue
+
+            checked += 1
+            if corrected:
+                corrected_polls += 1
+                self.stdout.write(
+                    f"Poll {poll_id}: corrected {corrected} counter(s), total votes {total_votes}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {checked} poll(s), {corrected_polls} had drifted counters."
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from polls.scheduler import sweep_poll_lifecycle
+
+
+class Command(BaseCommand):
+    help = "Open and close polls as their start and end times pass, snapshotting closed polls' results"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Seconds between sweeps (default: POLL_SCHEDULER_INTERVAL)",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run a single sweep and exit, e.g. from cron",
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.POLL_SCHEDULER_INTERVAL
+
+        while True:
+            close_old_connections()
+            opened, closed = sweep_poll_lifecycle()
+            if opened or closed or options['once']:
+                self.stdout.write(f"Opened {len(opened)} poll(s), closed {len(closed)} poll(s).")
+            if options['once']:
+                return
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                return
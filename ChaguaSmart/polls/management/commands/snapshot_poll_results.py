@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from polls.snapshots import snapshot_ended_polls
+
+
+class Command(BaseCommand):
+    help = "Snapshot the final results of every ended poll that has no snapshot yet"
+
+    def handle(self, *args, **options):
+        count = snapshot_ended_polls()
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted results of {count} poll(s)."))
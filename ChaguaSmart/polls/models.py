@@ -1,12 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 
+from config.tracking import FieldTrackingMixin
 
-class Poll(models.Model):
+
+class Poll(FieldTrackingMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Whether polls.scheduler opens the poll when its window starts. Cleared
+    # when is_active is set explicitly, which the scheduler then leaves be
+    opens_on_schedule = models.BooleanField(default=True)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -19,6 +24,32 @@ class Poll(models.Model):
     start_time = models.DateTimeField(default=timezone.now)
     end_time = models.DateTimeField(default=timezone.now)  
 
+    # Denormalized counter, maintained by the Vote signals
+    total_votes = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # polls/tests.py (QueryPlanTests) checks the list and sweep queries
+        # against these with EXPLAIN
+        indexes = [
+            # Newest-first cursor pagination (polls.pagination)
+            models.Index(fields=['-created_at', '-id']),
+            # The same for active polls only, a fraction of the table
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='polls_poll_active_newest_idx',
+            ),
+            # FilteredPollListView's created_by filter, newest first
+            models.Index(fields=['created_by', '-created_at', '-id']),
+            # Sweeps in polls.scheduler: closing on end_time...
+            models.Index(fields=['is_active', 'end_time']),
+            # ...and time-window lookups such as opening on start_time
+            models.Index(fields=['start_time', 'end_time']),
+        ]
+
+    # Fields whose changes polls/signals.py reacts to
+    TRACKED_FIELDS = ('end_time', 'is_active')
+
     def __str__(self):
         return self.title
 
@@ -48,26 +79,45 @@ class Poll(models.Model):
         return self.votes.filter(option_id=option_id).count()
 
     def get_results(self):
-        """Compute complete poll results"""
-        options = self.options.all()
-        total_votes = self.votes.count()
-        
-        results = []
-        for option in options:
-            vote_count = self.get_vote_count(option.id)
-            percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
-            
-            results.append({
-                'option_id': option.id,
-                'text': option.text,
-                'votes': vote_count,
-                'percentage': round(percentage, 2)
-            })
-        
-        return {
-            'total_votes': total_votes,
-            'results': results
-        }
+        """Return the poll's results, from its snapshot once it has ended.
+
+        Load the poll with ``select_related('result_snapshot')`` to read an
+        ended poll's results without another query.
+        """
+        if self.has_expired:
+            try:
+                return self.result_snapshot.results
+            except PollResultSnapshot.DoesNotExist:
+                pass
+        return self.compute_results()
+
+    def compute_results(self):
+        """Compute complete poll results from the per-option vote counters"""
+        options = self.options.order_by('id').values('id', 'text', 'vote_count')
+        return build_results(options)
+
+
+def build_results(options):
+    """Build a results payload from option dicts with id, text and vote_count"""
+    options = list(options)
+    total_votes = sum(option['vote_count'] for option in options)
+
+    results = []
+    for option in options:
+        vote_count = option['vote_count']
+        percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
+
+        results.append({
+            'option_id': option['id'],
+            'text': option['text'],
+            'votes': vote_count,
+            'percentage': round(percentage, 2)
+        })
+
+    return {
+        'total_votes': total_votes,
+        'results': results
+    }
 
 
 class Option(models.Model):
@@ -75,13 +125,12 @@ class Option(models.Model):
     text = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized counter, maintained by the Vote signals
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.text
 
-    @property
-    def vote_count(self):
-        return self.vote_set.count()
-
 
 class Vote(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='votes')
@@ -95,10 +144,43 @@ class Vote(models.Model):
     
     class Meta:
         unique_together = ('poll', 'user')  
+        indexes = [
+            # A user's vote history, newest first (polls.pagination)
+            models.Index(fields=['user', '-voted_at', '-id']),
+            # Per-option counts of a poll, answered from the index alone
+            models.Index(fields=['poll', 'option']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} voted for {self.option.text} in {self.poll.title}"
 
+    def save(self, *args, **kwargs):
+        # Keep the insert and the counter updates done by the post_save
+        # signal in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class PollResultSnapshot(models.Model):
+    """Final results of an ended poll, written once when it closes.
+
+    Keyed by the poll, so reading an ended poll's results is a single
+    primary-key lookup instead of an aggregation. See polls/snapshots.py.
+    """
+    poll = models.OneToOneField(
+        Poll,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='result_snapshot'
+    )
+    # The Poll.get_results() payload
+    results = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results of poll {self.poll_id}"
+
+
 class Region(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
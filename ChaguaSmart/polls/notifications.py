@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+
+from .models import Poll
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class NotificationQueue:
+    """Deliver notification emails from a background worker thread.
+
+    Jobs are queued once the surrounding transaction commits, so the request
+    that triggered them returns without waiting on the recipient query or
+    the mail server. The worker thread is started on first use.
+    """
+
+    def __init__(self, batch_size=None):
+        self._batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @property
+    def batch_size(self):
+        return self._batch_size or settings.NOTIFICATION_EMAIL_BATCH_SIZE
+
+    def enqueue(self, job, *args):
+        transaction.on_commit(lambda: self._put(job, args))
+
+    def _put(self, job, args):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='notification-worker', daemon=True
+                )
+                self._worker.start()
+        self._queue.put((job, args))
+
+    def _run(self):
+        while True:
+            job, args = self._queue.get()
+            try:
+                job(self, *args)
+            except Exception:
+                logger.exception("Notification job %s failed", job.__name__)
+            finally:
+                # Release this thread's DB connection between jobs
+                connections.close_all()
+                self._queue.task_done()
+
+    def send_in_batches(self, subject, body, recipients):
+        """Send one message per recipient, reusing a connection per batch.
+
+        ``recipients`` may be any iterable of addresses and is consumed
+        lazily, so only one batch is held in memory at a time.
+        """
+        sent = 0
+        batch = []
+        for email in recipients:
+            batch.append(email)
+            if len(batch) >= self.batch_size:
+                sent += self._send_batch(subject, body, batch)
+                batch = []
+        if batch:
+            sent += self._send_batch(subject, body, batch)
+        return sent
+
+    def _send_batch(self, subject, body, batch):
+        with get_connection(fail_silently=True) as connection:
+            messages = [
+                EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email])
+                for email in batch
+            ]
+            return connection.send_messages(messages) or 0
+
+
+def deliver_poll_created(notifications, poll_id):
+    """Email every user on the poll creator's campus about a new poll"""
+    poll = Poll.objects.select_related('created_by').filter(pk=poll_id).first()
+    if poll is None:
+        return
+
+    recipients = (
+        User.objects.filter(campus=poll.created_by.campus)
+        .exclude(email='')
+        .values_list('email', flat=True)
+        .iterator(chunk_size=notifications.batch_size)
+    )
+    sent = notifications.send_in_batches(
+        f'New Poll: {poll.title}',
+        f'A new poll has been created: {poll.title}',
+        recipients,
+    )
+    logger.info("Sent %d new poll notification(s) for poll %s", sent, poll_id)
+
+
+notifications = NotificationQueue()
+
+
+def notify_poll_created(poll_id):
+    """Queue the new poll email once the current transaction commits"""
+    notifications.enqueue(deliver_poll_created, poll_id)
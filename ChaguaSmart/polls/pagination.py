@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """Keyset pagination for newest-first lists.
+
+    Each page is fetched with ``WHERE <timestamp> < <cursor>`` on an indexed
+    column instead of ``OFFSET``, and without the ``COUNT(*)`` page number
+    pagination runs, so every page costs the same however deep the client
+    scrolls. The id breaks ties between rows created in the same instant.
+    Clients follow the ``next`` and ``previous`` links; there are no page
+    numbers or totals.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class PollCursorPagination(NewestFirstCursorPagination):
+    # Served by the (created_at, id) index on Poll
+    ordering = ('-created_at', '-id')
+
+
+class VoteCursorPagination(NewestFirstCursorPagination):
+    # Served by the (user, voted_at, id) index on Vote
+    ordering = ('-voted_at', '-id')
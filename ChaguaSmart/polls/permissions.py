@@ -0,0 +1,10 @@
+from rest_framework import permissions
+
+
+class IsPollCreatorOrAdmin(permissions.BasePermission):
+    """Allow changes to a poll only by its creator or an admin user"""
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.created_by_id == request.user.id or request.user.is_admin
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import ResultsConsumer
+
+websocket_urlpatterns = [
+    # Live results of one poll, see ResultsConsumer
+    path('ws/results/<int:poll_id>/', ResultsConsumer.as_asgi()),
+]
@@ -0,0 +1,89 @@
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .broadcast import send_to_results_group
+from .cache import poll_detail_key
+from .ingestion import vote_buffer
+from .models import Poll, PollResultSnapshot
+from .snapshots import take_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+def _flip(queryset, is_active):
+    # Lock the matching rows, skipping any another sweeper already holds,
+    # and flip them with a single UPDATE
+    poll_ids = list(
+        queryset.select_for_update(skip_locked=True).values_list('id', flat=True)
+    )
+    if poll_ids:
+        Poll.objects.filter(pk__in=poll_ids).update(is_active=is_active, updated_at=timezone.now())
+    return poll_ids
+
+
+def _broadcast(send, event_type, poll_ids, results=None):
+    for poll_id in poll_ids:
+        message = {'type': event_type, 'poll_id': poll_id}
+        if results is not None:
+            message['results'] = results.get(poll_id)
+        try:
+            send(poll_id, message)
+        except Exception:
+            logger.exception("Failed to broadcast %s for poll %s", event_type, poll_id)
+
+
+def announce_closed(poll_ids, send=send_to_results_group):
+    """Tell the watchers of snapshotted polls that they closed, once the
+    transaction commits.
+
+    The final results go with the message, so the subscribers do not all
+    fetch them at once.
+    """
+    if not poll_ids:
+        return
+    final_results = dict(
+        PollResultSnapshot.objects.filter(pk__in=poll_ids).values_list('pk', 'results')
+    )
+    transaction.on_commit(lambda: _broadcast(send, 'poll.closed', poll_ids, final_results))
+
+
+def sweep_poll_lifecycle(now=None, send=send_to_results_group):
+    """Open and close polls whose window started or ended since the last sweep.
+
+    ``Poll.is_active`` is kept in step with ``start_time`` and ``end_time``
+    here, in bulk, so reads can filter on the flag instead of comparing
+    timestamps. Polls whose ``is_active`` was set explicitly are never
+    opened here, only closed once they end. Closed polls get their results snapshotted, and watchers
+    of both opened and closed polls are notified over the results group,
+    those of closed polls along with the final results.
+
+    Returns a tuple of the opened and closed poll ids.
+    """
+    now = now or timezone.now()
+    # Write the votes this process has accepted but not stored yet, so the
+    # snapshots include them; votes buffered by other processes update the
+    # snapshots when they are flushed (see VoteBuffer)
+    vote_buffer.flush()
+    with transaction.atomic():
+        closed = _flip(Poll.objects.filter(is_active=True, end_time__lte=now), False)
+        opened = _flip(
+            Poll.objects.filter(
+                is_active=False, opens_on_schedule=True, start_time__lte=now, end_time__gt=now
+            ),
+            True,
+        )
+        take_snapshots(closed)
+
+        if opened or closed:
+            # take_snapshots drops the closed polls' own keys
+            keys = [poll_detail_key(poll_id) for poll_id in opened]
+            transaction.on_commit(lambda: cache.delete_many(keys))
+            transaction.on_commit(lambda: _broadcast(send, 'poll.opened', opened))
+            announce_closed(closed, send)
+
+    if opened or closed:
+        logger.info("Opened %d poll(s), closed %d poll(s)", len(opened), len(closed))
+    return opened, closed
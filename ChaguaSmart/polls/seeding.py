@@ -0,0 +1,166 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Poll, Option, Vote
+
+User = get_user_model()
+
+CAMPUSES = ['Main', 'North', 'South', 'East', 'West']
+
+BENCHMARK_PASSWORD = 'bench123'
+
+
+def campus_names(count):
+    """The first ``count`` campus names, numbering any beyond the defaults"""
+    names = CAMPUSES[:count]
+    names += [f'Campus {i}' for i in range(len(names), count)]
+    return names
+
+
+def generate_load_data(campuses=5, users=2000, polls=200, options_per_poll=5,
+                       votes=100000, seed=42, prefix='load',
+                       password=BENCHMARK_PASSWORD, batch_size=5000, log=None):
+    """Bulk-generate campuses' worth of users, polls, options and votes.
+
+    Every row is derived from ``prefix``, its index and ``seed``, so the
+    same arguments always describe the same dataset and re-running only
+    inserts what is missing. Rows are written with ``bulk_create`` in
+    ``batch_size`` chunks, and all users share one pre-computed password
+    hash. The Vote signals do not run for bulk inserts, so the denormalized
+    counters are rebuilt from grouped queries at the end.
+
+    Returns the admin user of the first campus.
+    """
+    log = log or (lambda message: None)
+    password_hash = make_password(password)
+    campus_list = campus_names(campuses)
+    now = timezone.now()
+
+    # One admin per campus; polls are spread across them
+    User.objects.bulk_create([
+        User(
+            username=f'{prefix}_admin{c}', email=f'{prefix}_admin{c}@chaguasmart.com',
+            password=password_hash, is_admin=True, is_staff=True, campus=campus
+        )
+        for c, campus in enumerate(campus_list)
+    ], ignore_conflicts=True)
+    admins = {
+        user.username: user
+        for user in User.objects.filter(username__startswith=f'{prefix}_admin')
+    }
+    admins = [admins[f'{prefix}_admin{c}'] for c in range(len(campus_list))]
+
+    rng = random.Random(seed)
+    for start in range(0, users, batch_size):
+        User.objects.bulk_create([
+            User(
+                username=f'{prefix}_user{i}', email=f'{prefix}_user{i}@chaguasmart.com',
+                password=password_hash, campus=rng.choice(campus_list)
+            )
+            for i in range(start, min(start + batch_size, users))
+        ], ignore_conflicts=True)
+    user_ids = _ids_by_index(
+        User.objects.filter(username__startswith=f'{prefix}_user'), 'username', f'{prefix}_user'
+    )
+    user_ids = [user_ids[i] for i in range(users)]
+    log(f"Users: {len(user_ids)}")
+
+    existing_polls = _ids_by_index(
+        Poll.objects.filter(created_by__in=admins, title__startswith=f'{prefix} poll '),
+        'title', f'{prefix} poll '
+    )
+    Poll.objects.bulk_create([
+        Poll(
+            title=f'{prefix} poll {i}', description='Generated for load testing',
+            created_by=admins[i % len(admins)], start_time=now - timedelta(days=1),
+            end_time=now + timedelta(days=1 + i % 30)
+        )
+        for i in range(polls) if i not in existing_polls
+    ], batch_size=batch_size)
+    poll_ids = _ids_by_index(
+        Poll.objects.filter(created_by__in=admins, title__startswith=f'{prefix} poll '),
+        'title', f'{prefix} poll '
+    )
+    poll_ids = [poll_ids[i] for i in range(polls)]
+    log(f"Polls: {len(poll_ids)}")
+
+    options_by_poll = {poll_id: {} for poll_id in poll_ids}
+    for option_id, poll_id, text in Option.objects.filter(
+        poll_id__in=poll_ids
+    ).values_list('id', 'poll_id', 'text'):
+        options_by_poll[poll_id][text] = option_id
+    Option.objects.bulk_create([
+        Option(poll_id=poll_id, text=f'Option {j}')
+        for poll_id in poll_ids
+        for j in range(options_per_poll)
+        if f'Option {j}' not in options_by_poll[poll_id]
+    ], batch_size=batch_size)
+    options_by_poll = {poll_id: [] for poll_id in poll_ids}
+    for option_id, poll_id in Option.objects.filter(
+        poll_id__in=poll_ids, text__in=[f'Option {j}' for j in range(options_per_poll)]
+    ).order_by('id').values_list('id', 'poll_id'):
+        options_by_poll[poll_id].append(option_id)
+
+    # Spread the votes evenly; each user votes at most once per poll and the
+    # (poll, user) constraint skips votes from an earlier run
+    per_poll = min(votes // max(polls, 1), len(user_ids))
+    batch = []
+    for i, poll_id in enumerate(poll_ids):
+        poll_rng = random.Random(f'{seed}-{i}')
+        for user_id in poll_rng.sample(user_ids, per_poll):
+            batch.append(Vote(
+                poll_id=poll_id, user_id=user_id,
+                option_id=poll_rng.choice(options_by_poll[poll_id])
+            ))
+        if len(batch) >= batch_size:
+            Vote.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+            batch = []
+    Vote.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+    log(f"Votes: {per_poll * len(poll_ids)}")
+
+    refresh_vote_counters(poll_ids)
+    return admins[0]
+
+
+def _ids_by_index(queryset, field, prefix):
+    # Map the numeric suffix of generated names back to primary keys
+    ids = {}
+    for pk, value in queryset.values_list('pk', field).iterator():
+        suffix = value[len(prefix):]
+        if suffix.isdigit():
+            ids[int(suffix)] = pk
+    return ids
+
+
+def seed_benchmark_data(users=2000, polls=200, options_per_poll=5, votes=100000,
+                        seed=42, batch_size=5000):
+    """Seed the dataset used for query budgets and latency benchmarks"""
+    return generate_load_data(
+        users=users, polls=polls, options_per_poll=options_per_poll, votes=votes,
+        seed=seed, prefix='bench', batch_size=batch_size
+    )
+
+
+def refresh_vote_counters(poll_ids):
+    """Set the denormalized counters of the given polls from the Vote table"""
+    option_counts = dict(
+        Vote.objects.filter(poll_id__in=poll_ids)
+        .values_list('option_id')
+        .annotate(n=Count('id'))
+        .values_list('option_id', 'n')
+    )
+    options = list(Option.objects.filter(poll_id__in=poll_ids).only('id', 'poll_id'))
+    poll_totals = dict.fromkeys(poll_ids, 0)
+    for option in options:
+        option.vote_count = option_counts.get(option.id, 0)
+        poll_totals[option.poll_id] += option.vote_count
+    Option.objects.bulk_update(options, ['vote_count'], batch_size=1000)
+    Poll.objects.bulk_update(
+        [Poll(id=poll_id, total_votes=total) for poll_id, total in poll_totals.items()],
+        ['total_votes'], batch_size=1000
+    )
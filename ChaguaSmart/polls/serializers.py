@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from .models import Poll, Option, Vote
+from .voting import create_vote
 
 User = get_user_model()
 
@@ -21,6 +22,26 @@ class OptionSerializer(serializers.ModelSerializer):
         return obj.vote_percentage
 
 
+class ExplicitActivationMixin:
+    """Take polls whose ``is_active`` is written explicitly off the schedule.
+
+    polls.scheduler then leaves them alone until they end, so an admin who
+    closes a poll early, or creates one closed, isn't overridden by the
+    next sweep.
+    """
+
+    def claim_schedule(self, validated_data):
+        if 'is_active' in validated_data:
+            validated_data['opens_on_schedule'] = False
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.claim_schedule(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.claim_schedule(validated_data))
+
+
 class PollListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for poll lists"""
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
@@ -35,7 +56,7 @@ class PollListSerializer(serializers.ModelSerializer):
         ]
 
 
-class PollDetailSerializer(serializers.ModelSerializer):
+class PollDetailSerializer(ExplicitActivationMixin, serializers.ModelSerializer):
     """Detailed serializer with options for poll detail view"""
     options = OptionSerializer(many=True, read_only=True)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
@@ -57,7 +78,7 @@ class PollDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'updated_at']
 
 
-class CreatePollSerializer(serializers.ModelSerializer):
+class CreatePollSerializer(ExplicitActivationMixin, serializers.ModelSerializer):
     options = serializers.ListField(
         child=serializers.CharField(max_length=255),
         write_only=True,
@@ -69,7 +90,7 @@ class CreatePollSerializer(serializers.ModelSerializer):
         model = Poll
         fields = [
             'title', 'description', 'start_time', 'end_time', 
-            'is_active', 'allow_multiple_votes', 'is_anonymous', 'options'
+            'is_active', 'options'
         ]
 
     def validate(self, data):
@@ -101,8 +122,10 @@ class CreatePollSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         options_data = validated_data.pop('options')
-        user = self.context['request'].user
-        poll = Poll.objects.create(created_by=user, **validated_data)
+        self.claim_schedule(validated_data)
+        # PollViewSet.perform_create passes the creator to save()
+        validated_data.setdefault('created_by', self.context['request'].user)
+        poll = Poll.objects.create(**validated_data)
         
         # Create options
         Option.objects.bulk_create([
@@ -113,7 +136,7 @@ class CreatePollSerializer(serializers.ModelSerializer):
         return poll
 
 
-class UpdatePollSerializer(serializers.ModelSerializer):
+class UpdatePollSerializer(ExplicitActivationMixin, serializers.ModelSerializer):
     """Serializer for updating polls (limited fields)"""
     
     class Meta:
@@ -137,8 +160,6 @@ class VoteSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'voted_at', 'poll']
 
     def validate(self, data):
-        request = self.context.get('request')
-        user = request.user if request else None
         option = data.get('option')
         
         if not option:
@@ -150,12 +171,8 @@ class VoteSerializer(serializers.ModelSerializer):
         if not poll.is_currently_active:
             raise serializers.ValidationError("This poll is not currently accepting votes.")
         
-        # Check if user has already voted (unless multiple votes allowed)
-        if user and not poll.allow_multiple_votes:
-            existing_vote = Vote.objects.filter(poll=poll, user=user).exists()
-            if existing_vote:
-                raise serializers.ValidationError("You have already voted on this poll.")
-        
+        # Duplicate votes are rejected by the (poll, user) unique constraint
+        # in create()
         return data
 
     def create(self, validated_data):
@@ -163,7 +180,10 @@ class VoteSerializer(serializers.ModelSerializer):
         validated_data['user'] = self.context['request'].user
         # Set poll from option
         validated_data['poll'] = validated_data['option'].poll
-        return super().create(validated_data)
+        vote = create_vote(**validated_data)
+        if vote is None:
+            raise serializers.ValidationError("You have already voted on this poll.")
+        return vote
 
 
 class CreateVoteSerializer(serializers.Serializer):
@@ -189,16 +209,10 @@ class CreateVoteSerializer(serializers.Serializer):
         option = Option.objects.get(id=validated_data['option_id'])
         poll = option.poll
         
-        # Check for existing vote
-        if not poll.allow_multiple_votes:
-            if Vote.objects.filter(poll=poll, user=user).exists():
-                raise serializers.ValidationError("You have already voted on this poll.")
-        
-        vote = Vote.objects.create(
-            user=user,
-            option=option,
-            poll=poll
-        )
+        # The (poll, user) unique constraint rejects duplicate votes
+        vote = create_vote(poll, option, user)
+        if vote is None:
+            raise serializers.ValidationError("You have already voted on this poll.")
         
         return vote
 
@@ -224,7 +238,7 @@ class UserVoteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'poll_title', 'option_text', 'voted_at']
 
 
-class PollSerializer(serializers.ModelSerializer):
+class PollSerializer(ExplicitActivationMixin, serializers.ModelSerializer):
     """Serializer for the Poll model"""
     
     class Meta:
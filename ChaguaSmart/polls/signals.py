@@ -1,3 +1,5 @@
+import logging
+
 from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
@@ -6,7 +8,12 @@ from django.db import transaction
 from django.core.cache import cache
 from django.db.models import Count, F
 
+from .broadcast import publish_vote_delta
 from .models import Poll, Option, Vote
+from .notifications import notify_poll_created
+from .snapshots import discard_snapshot, refresh_snapshot
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -16,21 +23,30 @@ def poll_created_or_updated(sender, instance, created, **kwargs):
     """Handle actions when a poll is created or updated"""
     # Clear cache for polls
     cache.delete(f'poll_{instance.id}')
-    cache.delete('active_polls')
+    cache.delete(f'poll_{instance.id}_results')
     
     if created:
         # Log poll creation
-        print(f"New poll created: {instance.title} by {instance.created_by}")
+        logger.info("Poll %s created by user %s", instance.id, instance.created_by_id)
         
-        # You could send notifications here
-        from django.core.mail import send_mail
-        send_mail(
-            f'New Poll: {instance.title}',
-            f'A new poll has been created: {instance.title}',
-         'noreply@chaguasmart.com',
-            [user.email for user in User.objects.filter(campus=instance.created_by.campus)],
-            fail_silently=True,
-        )
+        # Email the campus from the background notification worker
+        notify_poll_created(instance.id)
+    elif not instance.has_expired and instance.get_changed_fields() != set():
+        # Reopened (end_time moved into the future, or is_active set again):
+        # results can change again. Other edits leave the snapshot alone.
+        discard_snapshot(instance.id)
+
+    # What was just written is the new baseline for change tracking
+    instance.snapshot_tracked_fields()
+
+
+@receiver(post_delete, sender=Poll)
+def poll_deleted(sender, instance, **kwargs):
+    """Drop cached payloads for a deleted poll"""
+    cache.delete_many([
+        f'poll_{instance.id}',
+        f'poll_{instance.id}_results',
+    ])
 
 
 @receiver(post_save, sender=Option)
@@ -38,42 +54,57 @@ def option_created_or_updated(sender, instance, created, **kwargs):
     """Handle actions when a poll option is created or updated"""
     # Clear cache for related poll
     cache.delete(f'poll_{instance.poll_id}')
-    cache.delete(f'poll_{instance.poll_id}_options')
+    cache.delete(f'poll_{instance.poll_id}_results')
     
     if created:
         # Log option creation
-        print(f"New option added to poll '{instance.poll.title}': {instance.text}")
+        logger.info("Option %s added to poll %s", instance.id, instance.poll_id)
 
 
 @receiver(post_save, sender=Vote)
 def vote_cast(sender, instance, created, **kwargs):
     """Handle actions when a vote is cast"""
     if created:
-        # Clear result caches
-        cache.delete(f'poll_{instance.poll_id}_results')
-        cache.delete(f'user_{instance.user_id}_votes')
+        # Clear result caches once the counters are committed, so a concurrent
+        # read cannot re-cache the pre-vote counts
+        transaction.on_commit(lambda: cache.delete_many([
+            f'poll_{instance.poll_id}_results',
+            f'user_{instance.user_id}_votes',
+        ]))
         
         # Log vote
-        print(f"Vote cast by {instance.user} for '{instance.option.text}' in poll '{instance.poll.title}'")
+        logger.debug(
+            "Vote %s cast by user %s for option %s in poll %s",
+            instance.id, instance.user_id, instance.option_id, instance.poll_id
+        )
         
-        # Update poll statistics if needed
-        with transaction.atomic():
-            poll = instance.poll
-            option = instance.option
-            # If you had a total_votes field, you could update it directly
-            poll.total_votes = F('total_votes') + 1
-            poll.save(update_fields=['total_votes'])
+        # Update the denormalized vote counters
+        apply_vote_count_deltas(instance.poll_id, {instance.option_id: 1})
+
+        # Push the change to live results subscribers
+        publish_vote_delta(instance.poll_id, instance.option_id, 1)
 
 
 @receiver(post_delete, sender=Vote)
 def vote_deleted(sender, instance, **kwargs):
     """Handle actions when a vote is deleted"""
-    # Clear result caches
-    cache.delete(f'poll_{instance.poll_id}_results')
-    cache.delete(f'user_{instance.user_id}_votes')
+    # Clear result caches once the counters are committed
+    transaction.on_commit(lambda: cache.delete_many([
+        f'poll_{instance.poll_id}_results',
+        f'user_{instance.user_id}_votes',
+    ]))
     
     # Log vote deletion
-    print(f"Vote deleted: {instance.user} for option '{instance.option.text}' in poll '{instance.poll.title}'")
+    logger.debug(
+        "Vote %s deleted: user %s, option %s in poll %s",
+        instance.id, instance.user_id, instance.option_id, instance.poll_id
+    )
+
+    # Update the denormalized vote counters
+    apply_vote_count_deltas(instance.poll_id, {instance.option_id: -1})
+
+    # Push the change to live results subscribers
+    publish_vote_delta(instance.poll_id, instance.option_id, -1)
 
 
 @receiver(pre_save, sender=Poll)
@@ -82,33 +113,74 @@ def check_poll_dates(sender, instance, **kwargs):
     if instance.end_time and instance.start_time and instance.end_time <= instance.start_time:
         # Auto-adjust the end_time to be 1 day after start_time
         instance.end_time = instance.start_time + timezone.timedelta(days=1)
-        print(f"Warning: End time for poll '{instance.title}' was adjusted to be after start time")
+        logger.warning("End time for poll %s was adjusted to be after start time", instance.id)
 
 
-# Check if poll is expired and auto-close it
 @receiver(pre_save, sender=Poll)
-def auto_close_expired_polls(sender, instance, **kwargs):
-    """Auto-close polls that have reached their end_time"""
-    if instance.is_active and timezone.now() >= instance.end_time:
-        instance.is_active = False
-        print(f"Poll '{instance.title}' automatically closed as it reached end time")
+def set_initial_poll_state(sender, instance, **kwargs):
+    """Create polls active only if their voting window is already open,
+    unless the creator set ``is_active`` explicitly.
+
+    From then on polls.scheduler opens and closes polls in bulk as their
+    start and end times pass. Polls created with an explicit ``is_active``
+    have ``opens_on_schedule`` cleared by the serializers.
+    """
+    if instance._state.adding and instance.opens_on_schedule:
+        now = timezone.now()
+        instance.is_active = instance.start_time <= now < instance.end_time
+
+
+# Function to apply vote count changes to the denormalized counters
+def apply_vote_count_deltas(poll_id, option_deltas):
+    """Atomically add per-option vote deltas to the option and poll counters"""
+    total_delta = sum(option_deltas.values())
+
+    with transaction.atomic():
+        # Lock the poll row first so this always takes locks in the same
+        # order as recalculate_poll_vote_counts
+        if total_delta:
+            Poll.objects.filter(pk=poll_id).update(
+                total_votes=F('total_votes') + total_delta
+            )
+
+        for option_id, delta in option_deltas.items():
+            if delta:
+                Option.objects.filter(pk=option_id).update(
+                    vote_count=F('vote_count') + delta
+                )
 
 
 # Function to recalculate vote counts for a poll
 def recalculate_poll_vote_counts(poll_id):
-    """Recalculate and update vote counts for a poll's options"""
+    """Recalculate the denormalized vote counters for a poll's options.
+
+    Returns a tuple of the poll's total votes and the number of counters
+    that had drifted and were corrected.
+    """
     with transaction.atomic():
+        poll = Poll.objects.select_for_update().get(pk=poll_id)
+
         # Get all options with their vote counts
         options = Option.objects.filter(poll_id=poll_id).annotate(
-            votes_count=Count('vote')
+            votes_count=Count('votes')
         )
-        
-        # Update any cache or fields if needed
+
+        drifted = []
         for option in options:
-            cache.set(f'option_{option.id}_vote_count', option.votes_count, 3600)
-        
-        # Optionally update poll's total votes
+            if option.vote_count != option.votes_count:
+                option.vote_count = option.votes_count
+                drifted.append(option)
+        Option.objects.bulk_update(drifted, ['vote_count'])
+
         total_votes = sum(option.votes_count for option in options)
-        cache.set(f'poll_{poll_id}_total_votes', total_votes, 3600)
-        
-        return total_votes
\ No newline at end of file
+        corrected = len(drifted)
+        if poll.total_votes != total_votes:
+            Poll.objects.filter(pk=poll_id).update(total_votes=total_votes)
+            corrected += 1
+
+        if corrected:
+            # A closed poll's snapshot was taken from the drifted counters
+            refresh_snapshot(poll)
+            transaction.on_commit(lambda: cache.delete(f'poll_{poll_id}_results'))
+
+        return total_votes, corrected
\ No newline at end of file
@@ -0,0 +1,63 @@
+import logging
+from itertools import groupby
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import poll_detail_key, poll_results_key
+from .models import Option, Poll, PollResultSnapshot, build_results
+
+logger = logging.getLogger(__name__)
+
+
+def take_snapshots(poll_ids):
+    """Snapshot the current results of the given polls.
+
+    Results for every poll are built from one query over their options and
+    written with a single ``bulk_create``. Polls that already have a
+    snapshot keep it. Returns the number of polls snapshotted.
+    """
+    poll_ids = list(poll_ids)
+    if not poll_ids:
+        return 0
+
+    options = (
+        Option.objects.filter(poll_id__in=poll_ids)
+        .order_by('poll_id', 'id')
+        .values('poll_id', 'id', 'text', 'vote_count')
+    )
+    options_by_poll = {
+        poll_id: list(poll_options)
+        for poll_id, poll_options in groupby(options, key=lambda option: option['poll_id'])
+    }
+    snapshots = [
+        PollResultSnapshot(poll_id=poll_id, results=build_results(options_by_poll.get(poll_id, [])))
+        for poll_id in poll_ids
+    ]
+    PollResultSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+
+    # Cached payloads still describe the polls as open
+    keys = [key for poll_id in poll_ids for key in (poll_detail_key(poll_id), poll_results_key(poll_id))]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    logger.info("Snapshotted results of %d poll(s)", len(snapshots))
+    return len(snapshots)
+
+
+def snapshot_ended_polls(now=None):
+    """Snapshot every poll that has ended but has no snapshot yet"""
+    poll_ids = Poll.objects.filter(
+        end_time__lte=now or timezone.now(),
+        result_snapshot__isnull=True,
+    ).values_list('id', flat=True)
+    return take_snapshots(poll_ids)
+
+
+def refresh_snapshot(poll):
+    """Rewrite an existing snapshot, e.g. after its counters were corrected"""
+    return PollResultSnapshot.objects.filter(pk=poll.pk).update(results=poll.compute_results())
+
+
+def discard_snapshot(poll_id):
+    """Drop the snapshot of a poll that has been reopened"""
+    return PollResultSnapshot.objects.filter(pk=poll_id).delete()[0]
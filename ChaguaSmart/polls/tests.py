@@ -1,12 +1,45 @@
+import csv
+import json
+import re
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
 from django.test import TestCase
 from django.urls import reverse
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from polls.models import Poll, Option, Vote
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.db.models import Count
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from config.asgi import application
+from config.db_routers import ReplicaRouter, ReplicaRoutingMiddleware, use_primary, use_replica
+from polls.benchmarks import run_endpoint_benchmarks, run_subscriber_benchmark
+from polls.broadcast import ResultsDeltaBroadcaster, send_to_results_group
+from polls.cache import get_poll_results, poll_results_key
+from polls.checks import check_buffered_vote_cache
+from polls.ingestion import WARMING, VoteBuffer, vote_buffer, voters_warmed_key
+from polls.models import Poll, Option, PollResultSnapshot, Vote
+from polls.notifications import NotificationQueue, deliver_poll_created
+from polls.seeding import seed_benchmark_data
+from polls.serializers import CreatePollSerializer, UpdatePollSerializer, VoteSerializer
+from polls.views import CastVoteView
+from polls.voting import create_vote
+from polls.signals import recalculate_poll_vote_counts
+from polls.scheduler import sweep_poll_lifecycle
+from polls.snapshots import snapshot_ended_polls, take_snapshots
+from users.audit import login_audit
 from datetime import timedelta
+from io import StringIO
 
 User = get_user_model()
 
@@ -300,3 +333,1111 @@ class PollsApiTests(APITestCase):
         url = reverse('polls-list')  
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ResultsConsumerTests(TestCase):
+    """Test live results over the ASGI WebSocket route"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="watcher", password="pass123")
+        self.poll = Poll.objects.create(
+            title="Live Poll",
+            created_by=self.user,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option = Option.objects.create(poll=self.poll, text="Option 1", vote_count=3)
+
+    def communicator(self, poll_id):
+        return WebsocketCommunicator(
+            application, f'/ws/results/{poll_id}/',
+            headers=[(b'host', b'testserver'), (b'origin', b'http://testserver')],
+        )
+
+    def test_subscriber_receives_results_and_deltas(self):
+        async def watch():
+            communicator = self.communicator(self.poll.id)
+            connected, _ = await communicator.connect()
+            initial = await communicator.receive_json_from()
+            # Broadcasts from sync code, as the vote path sends them
+            await database_sync_to_async(send_to_results_group)(self.poll.id, {
+                'type': 'results.delta', 'poll_id': self.poll.id,
+                'deltas': {str(self.option.id): 1}, 'total_votes_delta': 1,
+            })
+            delta = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return connected, initial, delta
+
+        connected, initial, delta = async_to_sync(watch)()
+
+        self.assertTrue(connected)
+        self.assertEqual(initial['total_votes'], 3)
+        self.assertEqual(delta['deltas'], {str(self.option.id): 1})
+
+    def test_closing_message_carries_final_results(self):
+        final = {'total_votes': 4, 'results': []}
+
+        async def watch():
+            communicator = self.communicator(self.poll.id)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await database_sync_to_async(send_to_results_group)(self.poll.id, {
+                'type': 'poll.closed', 'poll_id': self.poll.id, 'results': final,
+            })
+            closed = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return closed
+
+        # Forwarded as sent rather than re-read (the counters say 3)
+        self.assertEqual(async_to_sync(watch)()['results'], final)
+
+    def test_unknown_poll_is_rejected(self):
+        async def watch():
+            communicator = self.communicator(self.poll.id + 1000)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        self.assertFalse(async_to_sync(watch)())
+
+    def test_foreign_origin_is_rejected(self):
+        async def watch():
+            communicator = WebsocketCommunicator(
+                application, f'/ws/results/{self.poll.id}/',
+                headers=[(b'host', b'testserver'), (b'origin', b'http://evil.example')],
+            )
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        self.assertFalse(async_to_sync(watch)())
+
+    def test_subscriber_benchmark_delivers_every_broadcast(self):
+        [result] = run_subscriber_benchmark(levels=(5,), broadcasts=3, timeout=5)
+
+        self.assertEqual(result.connected, 5)
+        self.assertEqual(result.delivered, result.expected)
+        self.assertEqual(result.expected, 15)
+
+
+class PollResultsTests(TestCase):
+    """Test the aggregated results engine"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            is_admin=True,
+            campus="Main"
+        )
+        self.poll = Poll.objects.create(
+            title="Results Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.options = [
+            Option.objects.create(poll=self.poll, text=f"Candidate {i}")
+            for i in range(12)
+        ]
+        voters = [
+            User.objects.create_user(username=f"voter{i}", password="pass123", campus="Main")
+            for i in range(3)
+        ]
+        Vote.objects.create(poll=self.poll, option=self.options[0], user=voters[0])
+        Vote.objects.create(poll=self.poll, option=self.options[0], user=voters[1])
+        Vote.objects.create(poll=self.poll, option=self.options[5], user=voters[2])
+
+    def test_results_use_single_query(self):
+        with self.assertNumQueries(1):
+            results = self.poll.get_results()
+
+        self.assertEqual(results['total_votes'], 3)
+        self.assertEqual(len(results['results']), 12)
+
+    def test_results_shape_and_percentages(self):
+        results = self.poll.get_results()['results']
+
+        self.assertEqual(results[0], {
+            'option_id': self.options[0].id,
+            'text': "Candidate 0",
+            'votes': 2,
+            'percentage': 66.67
+        })
+        self.assertEqual(results[5]['votes'], 1)
+        self.assertEqual(results[1]['percentage'], 0)
+
+
+class VoteCounterTests(TestCase):
+    """Test the denormalized vote counters"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            is_admin=True,
+            campus="Main"
+        )
+        self.student = User.objects.create_user(
+            username="student",
+            password="pass123",
+            campus="Main"
+        )
+        self.poll = Poll.objects.create(
+            title="Counter Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option1 = Option.objects.create(poll=self.poll, text="Option 1")
+        self.option2 = Option.objects.create(poll=self.poll, text="Option 2")
+
+    def test_counters_follow_vote_create_and_delete(self):
+        vote = Vote.objects.create(poll=self.poll, option=self.option1, user=self.student)
+        Vote.objects.create(poll=self.poll, option=self.option2, user=self.admin)
+
+        self.poll.refresh_from_db()
+        self.option1.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 2)
+        self.assertEqual(self.option1.vote_count, 1)
+
+        vote.delete()
+
+        self.poll.refresh_from_db()
+        self.option1.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 1)
+        self.assertEqual(self.option1.vote_count, 0)
+
+    def test_vote_signals_do_not_load_related_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            Vote.objects.create(
+                poll_id=self.poll.id, option_id=self.option1.id, user_id=self.student.id
+            )
+
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(selects, [])
+
+    def test_recalculate_fixes_drifted_counters(self):
+        Vote.objects.create(poll=self.poll, option=self.option1, user=self.student)
+        Option.objects.filter(pk=self.option1.pk).update(vote_count=7)
+        Poll.objects.filter(pk=self.poll.pk).update(total_votes=0)
+
+        total_votes, corrected = recalculate_poll_vote_counts(self.poll.id)
+
+        self.assertEqual(total_votes, 1)
+        self.assertEqual(corrected, 2)
+        self.option1.refresh_from_db()
+        self.assertEqual(self.option1.vote_count, 1)
+        self.assertEqual(self.poll.get_results()['total_votes'], 1)
+
+    def test_reconcile_command(self):
+        Vote.objects.bulk_create([
+            Vote(poll=self.poll, option=self.option2, user=self.student),
+        ])
+        out = StringIO()
+
+        call_command('reconcile_vote_counts', stdout=out)
+
+        self.option2.refresh_from_db()
+        self.assertEqual(self.option2.vote_count, 1)
+        self.assertIn("1 had drifted counters", out.getvalue())
+
+
+class PollCacheTests(TestCase):
+    """Test the results cache and its signal-driven invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            is_admin=True,
+            campus="Main"
+        )
+        self.poll = Poll.objects.create(
+            title="Cached Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option = Option.objects.create(poll=self.poll, text="Option 1")
+
+    def test_results_are_served_from_cache(self):
+        get_poll_results(self.poll.id)
+
+        with self.assertNumQueries(0):
+            results = get_poll_results(self.poll.id)
+        self.assertEqual(results['total_votes'], 0)
+
+    def test_vote_invalidates_cached_results(self):
+        get_poll_results(self.poll.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(poll=self.poll, option=self.option, user=self.admin)
+
+        self.assertEqual(get_poll_results(self.poll.id)['total_votes'], 1)
+
+    def test_cached_results_do_not_skip_the_lookup(self):
+        missing_id = self.poll.id + 1000
+        cache.set(poll_results_key(missing_id), {'results': [], 'total_votes': 0})
+
+        response = self.client.get(reverse('polls:polls-results', kwargs={'pk': missing_id}))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ResultsDeltaBroadcasterTests(TestCase):
+    """Test coalescing of live result deltas"""
+
+    def setUp(self):
+        self.sent = []
+        self.broadcaster = ResultsDeltaBroadcaster(
+            send=lambda poll_id, message: self.sent.append((poll_id, message)),
+            max_per_second=0.01
+        )
+
+    def test_deltas_are_coalesced_into_one_broadcast(self):
+        self.broadcaster.record(1, 10, 1)
+        self.broadcaster.record(1, 10, 1)
+        self.broadcaster.record(1, 11, 1)
+        self.broadcaster.record(1, 11, -1)
+
+        self.broadcaster.flush(1)
+
+        self.assertEqual(self.sent, [(1, {
+            'type': 'results.delta',
+            'poll_id': 1,
+            'deltas': {'10': 2},
+            'total_votes_delta': 2,
+        })])
+
+    def test_polls_are_flushed_independently(self):
+        self.broadcaster.record(1, 10, 1)
+        self.broadcaster.record(2, 20, 1)
+
+        self.broadcaster.flush(2)
+
+        self.assertEqual([poll_id for poll_id, _ in self.sent], [2])
+        self.broadcaster.flush(1)
+        self.assertEqual([poll_id for poll_id, _ in self.sent], [2, 1])
+
+
+class CastVoteTests(APITestCase):
+    """Test the single-insert vote write path"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            is_admin=True,
+            campus="Main"
+        )
+        self.student = User.objects.create_user(
+            username="student",
+            password="pass123",
+            campus="Main"
+        )
+        self.poll = Poll.objects.create(
+            title="Vote Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option1 = Option.objects.create(poll=self.poll, text="Option 1")
+        self.option2 = Option.objects.create(poll=self.poll, text="Option 2")
+        self.client.force_authenticate(self.student)
+        self.url = reverse('polls:polls-cast-vote', kwargs={'pk': self.poll.id})
+
+    def test_cast_vote(self):
+        response = self.client.post(self.url, {"option_id": self.option1.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['confirmation_id'], Vote.objects.get().id)
+
+    def test_second_vote_is_rejected_by_unique_constraint(self):
+        self.client.post(self.url, {"option_id": self.option1.id}, format='json')
+
+        response = self.client.post(self.url, {"option_id": self.option2.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "You already voted in this poll")
+        self.assertEqual(Vote.objects.count(), 1)
+        self.option1.refresh_from_db()
+        self.assertEqual(self.option1.vote_count, 1)
+
+    def test_invalid_option(self):
+        response = self.client.post(self.url, {"option_id": 999}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "Invalid option")
+
+    def test_vote_view_rejects_option_of_another_poll(self):
+        other_poll = Poll.objects.create(
+            title="Other Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        other_option = Option.objects.create(poll=other_poll, text="Elsewhere")
+
+        response = self.post_to_vote_view({"option": other_option.id})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "Invalid option.")
+        self.assertFalse(Vote.objects.exists())
+
+    def test_vote_view_reports_duplicate_vote(self):
+        self.assertEqual(
+            self.post_to_vote_view({"option": self.option1.id}).status_code,
+            status.HTTP_201_CREATED
+        )
+
+        response = self.post_to_vote_view({"option": self.option2.id})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "You have already voted.")
+
+    def test_vote_serializer_reports_duplicate_vote(self):
+        request = APIRequestFactory().post('/')
+        request.user = self.student
+        create_vote(self.poll, self.option1, self.student)
+
+        serializer = VoteSerializer(data={'option': self.option2.id}, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        with self.assertRaisesMessage(ValidationError, "You have already voted on this poll."):
+            serializer.save()
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        # The NOT NULL user_id is violated, and no vote of the poll matches
+        with self.assertRaises(IntegrityError):
+            create_vote(self.poll, self.option1, None)
+
+    def post_to_vote_view(self, data):
+        request = APIRequestFactory().post('/', data, format='json')
+        force_authenticate(request, user=self.student)
+        return CastVoteView.as_view()(request, poll_id=self.poll.id)
+
+
+class VoteBufferTests(TestCase):
+    """Test buffered vote ingestion"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            is_admin=True,
+            campus="Main"
+        )
+        self.poll = Poll.objects.create(
+            title="Buffered Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option1 = Option.objects.create(poll=self.poll, text="Option 1")
+        self.option2 = Option.objects.create(poll=self.poll, text="Option 2")
+        self.voters = [
+            User.objects.create_user(username=f"voter{i}", password="pass123", campus="Main")
+            for i in range(3)
+        ]
+        # A long interval keeps the timer from flushing during the test
+        self.buffer = VoteBuffer(flush_size=100, flush_interval=60)
+
+    def tearDown(self):
+        self.buffer.flush()
+
+    def test_flush_writes_batch_and_updates_counters(self):
+        for voter in self.voters:
+            self.assertTrue(self.buffer.submit(self.poll.id, self.option1.id, voter.id))
+        self.assertEqual(Vote.objects.count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.flush()
+
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 3)
+        self.option1.refresh_from_db()
+        self.poll.refresh_from_db()
+        self.assertEqual(self.option1.vote_count, 3)
+        self.assertEqual(self.poll.total_votes, 3)
+
+    def test_duplicate_submit_is_rejected(self):
+        self.assertTrue(self.buffer.submit(self.poll.id, self.option1.id, self.voters[0].id))
+        self.assertFalse(self.buffer.submit(self.poll.id, self.option2.id, self.voters[0].id))
+
+    def test_existing_votes_are_rejected(self):
+        Vote.objects.create(poll=self.poll, option=self.option1, user=self.voters[0])
+
+        self.assertFalse(self.buffer.submit(self.poll.id, self.option2.id, self.voters[0].id))
+
+    def test_flush_size_triggers_write(self):
+        buffer = VoteBuffer(flush_size=2, flush_interval=60)
+
+        buffer.submit(self.poll.id, self.option1.id, self.voters[0].id)
+        self.assertEqual(Vote.objects.count(), 0)
+        buffer.submit(self.poll.id, self.option2.id, self.voters[1].id)
+
+        self.assertEqual(Vote.objects.count(), 2)
+
+    @override_settings(VOTE_INGESTION_MODE='buffered')
+    def test_buffered_cast_vote_returns_accepted(self):
+        client = APIClient()
+        client.force_authenticate(self.voters[0])
+        url = reverse('polls:polls-cast-vote', kwargs={'pk': self.poll.id})
+
+        response = client.post(url, {"option_id": self.option1.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        response = client.post(url, {"option_id": self.option2.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        vote_buffer.flush()
+        self.assertEqual(Vote.objects.get(poll=self.poll).option, self.option1)
+
+    def test_failed_batch_releases_voters(self):
+        class FailingVoteBuffer(VoteBuffer):
+            def write(self, items):
+                raise DatabaseError("database unavailable")
+
+        buffer = FailingVoteBuffer(flush_size=100, flush_interval=60)
+        self.assertTrue(buffer.submit(self.poll.id, self.option1.id, self.voters[0].id))
+
+        for _ in range(buffer.max_attempts):
+            buffer.flush()
+
+        self.assertFalse(Vote.objects.exists())
+        self.assertTrue(self.buffer.submit(self.poll.id, self.option1.id, self.voters[0].id))
+
+    def test_failed_batch_is_retried(self):
+        class FlakyVoteBuffer(VoteBuffer):
+            failures = 1
+
+            def write(self, items):
+                if self.failures:
+                    self.failures -= 1
+                    raise DatabaseError("database unavailable")
+                super().write(items)
+
+        buffer = FlakyVoteBuffer(flush_size=100, flush_interval=60)
+        buffer.submit(self.poll.id, self.option1.id, self.voters[0].id)
+
+        buffer.flush()
+        self.assertFalse(Vote.objects.exists())
+        # Still held as voted while the batch waits for its retry
+        self.assertFalse(self.buffer.submit(self.poll.id, self.option2.id, self.voters[0].id))
+        buffer.flush()
+
+        self.assertEqual(Vote.objects.get(poll=self.poll).user, self.voters[0])
+
+    def test_existing_votes_are_rejected_while_another_worker_warms(self):
+        cache.set(voters_warmed_key(self.poll.id), WARMING)
+        Vote.objects.create(poll=self.poll, option=self.option1, user=self.voters[0])
+
+        self.assertFalse(self.buffer.submit(self.poll.id, self.option2.id, self.voters[0].id))
+        self.assertTrue(self.buffer.submit(self.poll.id, self.option2.id, self.voters[1].id))
+
+    @override_settings(VOTE_INGESTION_MODE='buffered', CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(settings.BASE_DIR / 'cache'),
+    }})
+    def test_buffered_mode_needs_an_atomic_cache(self):
+        errors = check_buffered_vote_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['polls.E001'])
+
+
+class PollNotificationTests(TestCase):
+    """Test new poll email delivery"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin",
+            password="pass123",
+            email="admin@example.com",
+            is_admin=True,
+            campus="Main"
+        )
+        for i in range(5):
+            User.objects.create_user(
+                username=f"student{i}", password="pass123",
+                email=f"student{i}@example.com", campus="Main"
+            )
+        User.objects.create_user(
+            username="other", password="pass123",
+            email="other@example.com", campus="Other"
+        )
+
+    def create_poll(self):
+        return Poll.objects.create(
+            title="Notify Poll",
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+
+    def test_poll_creation_does_not_send_inline(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_poll()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_delivery_sends_to_campus_in_batches(self):
+        poll = self.create_poll()
+        notifications = NotificationQueue(batch_size=2)
+
+        deliver_poll_created(notifications, poll.id)
+
+        recipients = sorted(message.to[0] for message in mail.outbox)
+        self.assertEqual(len(recipients), 6)
+        self.assertNotIn("other@example.com", recipients)
+        self.assertEqual(mail.outbox[0].subject, "New Poll: Notify Poll")
+
+
+class QueryBudgetTests(TestCase):
+    """Keep every endpoint within its query budget.
+
+    The budgets do not depend on data volume, so a small seeded dataset is
+    enough to catch N+1 regressions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(users=60, polls=30, options_per_poll=4, votes=600)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        # Write the queued login history inside the test transaction
+        login_audit.flush()
+
+    def test_endpoints_within_query_budget(self):
+        for result in run_endpoint_benchmarks(iterations=3):
+            with self.subTest(endpoint=result.name):
+                self.assertLessEqual(result.max_queries, result.budget)
+                self.assertTrue(all(200 <= code < 300 for code in result.statuses))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command('benchmark_endpoints', iterations=2, stdout=out)
+
+        self.assertIn("within budget", out.getvalue())
+
+
+class LoadDataTests(TestCase):
+    """Test the bulk load data generator"""
+
+    def generate(self, **kwargs):
+        options = dict(campuses=3, users=40, polls=6, options=3, votes=120, seed=7, stdout=StringIO())
+        options.update(kwargs)
+        call_command('generate_load_data', **options)
+
+    def test_generates_requested_volumes(self):
+        self.generate()
+
+        self.assertEqual(User.objects.filter(username__startswith='load_user').count(), 40)
+        self.assertEqual(set(User.objects.values_list('campus', flat=True)), {'Main', 'North', 'South'})
+        self.assertEqual(Poll.objects.count(), 6)
+        self.assertEqual(Option.objects.count(), 18)
+        self.assertEqual(Vote.objects.count(), 120)
+        self.assertEqual(
+            sum(Poll.objects.values_list('total_votes', flat=True)), 120
+        )
+
+    def test_rerun_is_idempotent_and_deterministic(self):
+        self.generate()
+        first = set(Vote.objects.values_list('poll__title', 'user__username', 'option__text'))
+
+        self.generate()
+
+        self.assertEqual(Poll.objects.count(), 6)
+        self.assertEqual(
+            set(Vote.objects.values_list('poll__title', 'user__username', 'option__text')), first
+        )
+
+    def test_rerun_extends_existing_data(self):
+        self.generate()
+        first = set(Vote.objects.values_list('id', flat=True))
+
+        self.generate(users=60, polls=8)
+
+        self.assertEqual(User.objects.filter(username__startswith='load_user').count(), 60)
+        self.assertEqual(Poll.objects.count(), 8)
+        self.assertTrue(first <= set(Vote.objects.values_list('id', flat=True)))
+        self.assertEqual(Poll.objects.order_by('-id')[0].total_votes, 15)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+        'poll_vote': '1/min',
+    },
+})
+class VoteThrottleTests(APITestCase):
+    """Test that repeated votes are throttled before touching the database"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='voter', password='pass123')
+        self.poll = Poll.objects.create(
+            title='Throttled Poll',
+            created_by=self.user,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option = Option.objects.create(poll=self.poll, text='Option 1')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def cast_vote(self, poll):
+        return self.client.post(
+            reverse('polls:polls-cast-vote', kwargs={'pk': poll.id}),
+            {'option_id': self.option.id}, format='json'
+        )
+
+    def test_repeat_vote_throttled_without_queries(self):
+        self.assertEqual(self.cast_vote(self.poll).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.cast_vote(self.poll)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttle_is_per_poll(self):
+        other_poll = Poll.objects.create(
+            title='Other Poll',
+            created_by=self.user,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.cast_vote(self.poll)
+
+        # Reaches the view, which rejects the option of the other poll
+        self.assertEqual(self.cast_vote(other_poll).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PollCursorPaginationTests(APITestCase):
+    """Test that the poll list pages by cursor instead of COUNT and OFFSET"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='creator', password='pass123')
+        for i in range(7):
+            Poll.objects.create(
+                title=f'Poll {i}',
+                created_by=self.user,
+                start_time=timezone.now(),
+                end_time=timezone.now() + timedelta(days=1)
+            )
+
+    def test_pages_follow_cursor_newest_first(self):
+        url = reverse('polls:polls-list') + '?page_size=3'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+            self.assertNotIn('OFFSET', queries[0]['sql'])
+            seen.extend(poll['id'] for poll in response.data['results'])
+            url = response.data['next']
+
+        expected = list(
+            Poll.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+
+class PollExportTests(APITestCase):
+    """Test the streaming vote and result exports"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass123', is_staff=True
+        )
+        self.poll = Poll.objects.create(
+            title='Export Poll',
+            created_by=self.admin,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option1 = Option.objects.create(poll=self.poll, text='Yes, "really"')
+        self.option2 = Option.objects.create(poll=self.poll, text='No')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', password='pass123')
+            for i in range(3)
+        ]
+        for voter, option in zip(self.voters, [self.option1, self.option1, self.option2]):
+            Vote.objects.create(poll=self.poll, option=option, user=voter)
+        self.url = reverse('polls:polls-export', kwargs={'pk': self.poll.id})
+        self.admin_token = RefreshToken.for_user(self.admin).access_token
+
+    def export(self, user=None, **params):
+        token = RefreshToken.for_user(user or self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.get(self.url, params)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_votes_csv_is_streamed(self):
+        response = self.export()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'poll-{self.poll.id}-votes.csv', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(self.content(response))))
+        self.assertEqual(rows[0], ['vote_id', 'user_id', 'username', 'option_id', 'option', 'voted_at'])
+        self.assertEqual([row[2] for row in rows[1:]], ['voter0', 'voter1', 'voter2'])
+        self.assertEqual(rows[1][4], 'Yes, "really"')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    async def test_asgi_export_streams_asynchronously(self):
+        response = await self.async_client.get(
+            self.url, headers={'Authorization': f'Bearer {self.admin_token}'}
+        )
+
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # The header and three votes, two lines per chunk
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.reader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual([row[2] for row in rows[1:]], ['voter0', 'voter1', 'voter2'])
+
+    def test_results_ndjson(self):
+        response = self.export(type='results', output='ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(lines, [
+            {'option_id': self.option1.id, 'option': 'Yes, "really"', 'votes': 2, 'percentage': 66.67},
+            {'option_id': self.option2.id, 'option': 'No', 'votes': 1, 'percentage': 33.33},
+        ])
+
+    def test_export_requires_staff(self):
+        self.assertEqual(self.export(self.voters[0]).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_export_rejected(self):
+        self.assertEqual(self.export(output='xml').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PollResultSnapshotTests(APITestCase):
+    """Test that ended polls serve their results from a one-off snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass123', is_admin=True)
+        self.poll = Poll.objects.create(
+            title='Snapshot Poll',
+            created_by=self.admin,
+            start_time=timezone.now() - timedelta(days=1),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+        self.option = Option.objects.create(poll=self.poll, text='Option 1')
+        voter = User.objects.create_user(username='voter', password='pass123')
+        Vote.objects.create(poll=self.poll, option=self.option, user=voter)
+
+    def close(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse('polls:polls-close-poll', kwargs={'pk': self.poll.id}))
+        self.client.force_authenticate(None)
+        return response
+
+    def test_close_poll_snapshots_results(self):
+        self.assertEqual(self.close().status_code, status.HTTP_200_OK)
+
+        snapshot = PollResultSnapshot.objects.get(poll=self.poll)
+        self.assertEqual(snapshot.results['total_votes'], 1)
+
+        # Later counter changes do not alter an ended poll's results
+        Option.objects.filter(pk=self.option.pk).update(vote_count=5)
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('polls:polls-results', kwargs={'pk': self.poll.id}))
+        self.assertEqual(response.data['results'][0]['votes'], 1)
+
+    def test_reopening_discards_snapshot(self):
+        self.close()
+        self.poll.refresh_from_db()
+
+        self.poll.end_time = timezone.now() + timedelta(days=1)
+        self.poll.save()
+
+        self.assertFalse(PollResultSnapshot.objects.filter(poll=self.poll).exists())
+
+    def test_other_edits_keep_snapshot(self):
+        take_snapshots([self.poll.id])
+        poll = Poll.objects.get(pk=self.poll.pk)
+
+        poll.title = 'Renamed Poll'
+        poll.save()
+        self.assertTrue(PollResultSnapshot.objects.filter(poll=poll).exists())
+
+        poll.end_time += timedelta(hours=1)
+        poll.save()
+        self.assertFalse(PollResultSnapshot.objects.filter(poll=poll).exists())
+
+    def test_late_buffered_votes_update_snapshot(self):
+        buffer = VoteBuffer(flush_size=100, flush_interval=60)
+        other = Poll.objects.create(
+            title='Other Poll', created_by=self.admin,
+            start_time=timezone.now() - timedelta(days=1), end_time=timezone.now() + timedelta(days=1)
+        )
+        other_option = Option.objects.create(poll=other, text='Option A')
+        buffer.submit(other.id, other_option.id, self.admin.id)
+        take_snapshots([other.id])
+
+        # Accepted before the poll closed, flushed by another worker after
+        buffer.flush()
+
+        self.assertEqual(PollResultSnapshot.objects.get(poll=other).results['total_votes'], 1)
+
+    def test_close_poll_includes_buffered_votes(self):
+        voter = User.objects.create_user(username='late_voter', password='pass123')
+        vote_buffer.submit(self.poll.id, self.option.id, voter.id)
+
+        self.close()
+
+        self.assertEqual(PollResultSnapshot.objects.get(poll=self.poll).results['total_votes'], 2)
+
+    def test_sweep_snapshots_only_ended_polls(self):
+        ended = Poll.objects.create(
+            title='Ended Poll',
+            created_by=self.admin,
+            start_time=timezone.now() - timedelta(days=2),
+            end_time=timezone.now() - timedelta(days=1)
+        )
+        Option.objects.create(poll=ended, text='Option A')
+
+        with self.assertNumQueries(3):
+            self.assertEqual(snapshot_ended_polls(), 1)
+        self.assertEqual(snapshot_ended_polls(), 0)
+
+        self.assertEqual(
+            list(PollResultSnapshot.objects.values_list('poll_id', flat=True)), [ended.id]
+        )
+
+
+class PollSchedulerTests(TestCase):
+    """Test the bulk open/close sweep that keeps is_active in step"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='creator', password='pass123')
+        now = timezone.now()
+        self.open_poll = Poll.objects.create(
+            title='Open Poll', created_by=self.user,
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1)
+        )
+        self.future_poll = Poll.objects.create(
+            title='Future Poll', created_by=self.user,
+            start_time=now + timedelta(hours=1), end_time=now + timedelta(days=1)
+        )
+        self.option = Option.objects.create(poll=self.open_poll, text='Option 1')
+        self.sent = []
+
+    def sweep(self, now):
+        with self.captureOnCommitCallbacks(execute=True):
+            return sweep_poll_lifecycle(now, send=lambda poll_id, message: self.sent.append(message))
+
+    def test_new_polls_start_active_only_inside_their_window(self):
+        self.assertTrue(self.open_poll.is_active)
+        self.assertFalse(self.future_poll.is_active)
+
+    def test_explicit_is_active_is_kept(self):
+        now = timezone.now()
+        request = APIRequestFactory().post('/api/polls/')
+        request.user = self.user
+        serializer = CreatePollSerializer(
+            data={
+                'title': 'Preview Poll', 'is_active': True, 'options': ['Yes', 'No'],
+                'start_time': now + timedelta(hours=1), 'end_time': now + timedelta(days=1),
+            },
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        poll = serializer.save()
+
+        poll.refresh_from_db()
+        self.assertTrue(poll.is_active)
+        self.assertFalse(poll.opens_on_schedule)
+
+    def test_sweep_keeps_explicitly_inactive_polls_closed(self):
+        serializer = UpdatePollSerializer(self.open_poll, data={'is_active': False}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertEqual(self.sweep(timezone.now()), ([], []))
+        self.open_poll.refresh_from_db()
+        self.assertFalse(self.open_poll.is_active)
+
+    def test_sweep_opens_and_closes_in_bulk(self):
+        later = timezone.now() + timedelta(hours=2)
+
+        opened, closed = self.sweep(later)
+
+        self.assertEqual((opened, closed), ([self.future_poll.id], [self.open_poll.id]))
+        self.open_poll.refresh_from_db()
+        self.future_poll.refresh_from_db()
+        self.assertFalse(self.open_poll.is_active)
+        self.assertTrue(self.future_poll.is_active)
+        self.assertTrue(PollResultSnapshot.objects.filter(poll=self.open_poll).exists())
+        self.assertCountEqual(self.sent, [
+            {'type': 'poll.opened', 'poll_id': self.future_poll.id},
+            {'type': 'poll.closed', 'poll_id': self.open_poll.id, 'results': {
+                'total_votes': 0,
+                'results': [
+                    {'option_id': self.option.id, 'text': 'Option 1', 'votes': 0, 'percentage': 0},
+                ],
+            }},
+        ])
+
+        # Nothing left to do on the next tick
+        self.assertEqual(self.sweep(later), ([], []))
+
+    def test_run_poll_scheduler_once(self):
+        Poll.objects.filter(pk=self.open_poll.pk).update(end_time=timezone.now())
+        out = StringIO()
+
+        call_command('run_poll_scheduler', '--once', stdout=out)
+
+        self.assertIn('closed 1 poll(s)', out.getvalue())
+
+
+def full_table_scans(queryset):
+    """Return the lines of the query plan that read a whole table.
+
+    On PostgreSQL sequential scans are disabled for the EXPLAIN, so the
+    planner only falls back to one when no index can serve the query.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        return [line for line in plan.splitlines() if 'Seq Scan' in line]
+    # SQLite: "SCAN <table>", as opposed to "SCAN <table> USING INDEX <index>"
+    return [line for line in queryset.explain().splitlines() if re.search(r'\bSCAN \S+$', line)]
+
+
+class QueryPlanTests(TestCase):
+    """Fail if the hot poll queries stop using their indexes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='creator', password='pass123')
+        self.now = timezone.now()
+
+    def assert_uses_index(self, queryset):
+        self.assertEqual(full_table_scans(queryset), [], queryset.explain())
+
+    def test_active_poll_list(self):
+        self.assert_uses_index(
+            Poll.objects.filter(is_active=True).order_by('-created_at', '-id')
+        )
+
+    def test_filtered_poll_list(self):
+        self.assert_uses_index(
+            Poll.objects.filter(created_by=self.user).order_by('-created_at', '-id')
+        )
+
+    def test_scheduler_sweeps(self):
+        self.assert_uses_index(Poll.objects.filter(is_active=True, end_time__lte=self.now))
+        self.assert_uses_index(
+            Poll.objects.filter(
+                is_active=False, opens_on_schedule=True,
+                start_time__lte=self.now, end_time__gt=self.now,
+            )
+        )
+
+    def test_polls_open_now(self):
+        self.assert_uses_index(
+            Poll.objects.filter(start_time__lte=self.now, end_time__gt=self.now)
+            .order_by('-start_time')
+        )
+
+    def test_grouped_vote_counts(self):
+        self.assert_uses_index(
+            Vote.objects.filter(poll_id=1).values('option_id').annotate(votes=Count('id'))
+        )
+
+
+@override_settings(DATABASE_REPLICA_ALIAS='replica', DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    # Test databases mirror the primary, so only the routing decision is checked
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.routed_to = None
+        self.user = User.objects.create_user(username='voter', password='pass123')
+
+        def get_response(request):
+            self.routed_to = self.router.db_for_read(Poll)
+            # As the view's authentication would
+            request.user = self.user
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def get(self, user=None):
+        headers = {}
+        if user is not None:
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+        return self.factory.get('/api/polls/', headers=headers)
+
+    def test_safe_request_reads_from_replica(self):
+        self.middleware(self.get(self.user))
+        self.assertEqual(self.routed_to, 'replica')
+
+    def test_write_request_stays_on_primary_and_pins_the_user(self):
+        self.middleware(self.factory.post('/api/polls/1/vote/'))
+
+        self.assertEqual(self.routed_to, 'default')
+        self.assertEqual(self.router.db_for_write(Vote), 'default')
+
+        # The user's next read goes to the primary, other users' do not
+        self.middleware(self.get(self.user))
+        self.assertEqual(self.routed_to, 'default')
+        other = User.objects.create_user(username='other', password='pass123')
+        self.middleware(self.get(other))
+        self.assertEqual(self.routed_to, 'replica')
+
+    def test_streamed_body_reads_from_replica(self):
+        def get_response(request):
+            def rows():
+                yield self.router.db_for_read(Vote)
+            return StreamingHttpResponse(rows())
+
+        response = ReplicaRoutingMiddleware(get_response)(self.get())
+
+        self.assertEqual(b''.join(response.streaming_content), b'replica')
+        self.assertEqual(self.router.db_for_read(Vote), 'default')
+
+    async def test_async_streamed_body_reads_from_replica(self):
+        def get_response(request):
+            async def rows():
+                yield self.router.db_for_read(Vote)
+            return StreamingHttpResponse(rows())
+
+        response = ReplicaRoutingMiddleware(get_response)(self.get())
+
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b'replica'])
+
+    def test_use_primary_overrides_use_replica(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Poll), 'replica')
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Poll), 'default')
+        self.assertEqual(self.router.db_for_read(Poll), 'default')
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_no_replica_configured(self):
+        self.middleware(self.factory.get('/api/polls/'))
+        self.assertEqual(self.routed_to, 'default')
@@ -0,0 +1,33 @@
+from users.throttles import SlidingWindowRateThrottle
+
+
+class VoteRateThrottle(SlidingWindowRateThrottle):
+    """Limit vote requests per user across all polls (per IP without a token)"""
+    scope = 'vote'
+
+    def get_ident_for(self, request, view):
+        user_id = self.get_token_user_id(request)
+        if user_id is None:
+            return f'ip_{self.get_ident(request)}'
+        return f'user_{user_id}'
+
+
+class PollVoteRateThrottle(SlidingWindowRateThrottle):
+    """Limit repeated vote requests from one user on the same poll"""
+    scope = 'poll_vote'
+
+    def get_ident_for(self, request, view):
+        user_id = self.get_token_user_id(request)
+        if user_id is None:
+            return None
+        poll_id = self.get_poll_id(request, view)
+        if poll_id is None:
+            return None
+        return f'{poll_id}_{user_id}'
+
+    def get_poll_id(self, request, view):
+        """The poll voted on, from the URL or a ``poll`` field in the body"""
+        poll_id = view.kwargs.get('pk') or view.kwargs.get('poll_id')
+        if poll_id is None and hasattr(request.data, 'get'):
+            poll_id = request.data.get('poll')
+        return poll_id
@@ -1,9 +1,16 @@
 from rest_framework import generics, permissions
 from rest_framework.response import Response
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from .models import Poll, Option, Vote
 from .serializers import PollSerializer, VoteSerializer
+from .throttles import PollVoteRateThrottle, VoteRateThrottle
+from .voting import create_vote
+from users.throttles import ThrottleFirstMixin
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny
 User = get_user_model()
@@ -18,21 +25,29 @@ class CustomTokenRefreshView(TokenRefreshView):
 
 from rest_framework.exceptions import PermissionDenied
 
-class CastVoteView(generics.CreateAPIView):
+class CastVoteView(ThrottleFirstMixin, generics.CreateAPIView):
+    throttle_classes = [VoteRateThrottle, PollVoteRateThrottle]
+
     def create(self, request, *args, **kwargs):
         user = request.user
-        poll_id = self.kwargs.get("poll_id")
-        option_id = request.data.get("option")
-
-        poll = Poll.objects.get(id=poll_id)
+        poll = get_object_or_404(Poll, id=self.kwargs.get("poll_id"))
 
-        if not poll.is_active:
+        if not poll.is_currently_active:
             raise PermissionDenied("This poll has expired.")
 
-        if Vote.objects.filter(user=user, poll_id=poll_id).exists():
-            return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            option = poll.options.get(id=request.data.get("option"))
+        except (Option.DoesNotExist, ValueError):
+            return Response({"detail": "Invalid option."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.VOTE_INGESTION_MODE == 'buffered':
+            if not vote_buffer.submit(poll.id, option.id, user.id):
+                return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Vote accepted."}, status=status.HTTP_202_ACCEPTED)
 
-        vote = Vote.objects.create(user=user, poll=poll, option_id=option_id)
+        vote = create_vote(poll, option, user)
+        if vote is None:
+            return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
         return Response(VoteSerializer(vote).data, status=status.HTTP_201_CREATED)
 
 from django.contrib import admin
@@ -55,33 +70,28 @@ urlpatterns = [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
 
-# polls/views.py
-
-from rest_framework.exceptions import PermissionDenied
-
-class CastVoteView(generics.CreateAPIView):
-    ...
-
-    def create(self, request, *args, **kwargs):
-        user = request.user
-        poll_id = self.kwargs.get("poll_id")
-        option_id = request.data.get("option")
-
-        poll = Poll.objects.get(id=poll_id)
-
-        if not poll.is_active:
-            raise PermissionDenied("This poll has expired.")
-
-        if Vote.objects.filter(user=user, poll_id=poll_id).exists():
-            return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
-
-        vote = Vote.objects.create(user=user, poll=poll, option_id=option_id)
-        return Response(VoteSerializer(vote).data, status=status.HTTP_201_CREATED)
-
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.utils import timezone
+from rest_framework.authentication import SessionAuthentication
+from users.authentication import CachedJWTAuthentication, TokenClaimsJWTAuthentication
+from .cache import get_poll_detail, get_poll_results
+from .exports import (
+    RESULT_EXPORT_FIELDS,
+    VOTE_EXPORT_FIELDS,
+    aiter_in_chunks,
+    iter_result_rows,
+    iter_vote_rows,
+    stream_csv,
+    stream_ndjson,
+)
+from .ingestion import vote_buffer
 from .models import Poll, Option, Vote
+from .pagination import PollCursorPagination
+from .permissions import IsPollCreatorOrAdmin
+from .scheduler import announce_closed
+from .snapshots import take_snapshots
 from .serializers import (
     PollSerializer,
     CreatePollSerializer,
@@ -89,10 +99,23 @@ from .serializers import (
     VoteSerializer
 )
 
-class PollViewSet(viewsets.ModelViewSet):
-    queryset = Poll.objects.all().order_by('-created_at')
+class PollViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
+    queryset = Poll.objects.all().order_by('-created_at', '-id')
+    pagination_class = PollCursorPagination
+    # Reads only need the token claims, not the user row
+    authentication_classes = [TokenClaimsJWTAuthentication, SessionAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # PollSerializer lists option ids; fetch them for the whole page
+            queryset = queryset.prefetch_related('options')
+        elif self.action in ('results', 'export'):
+            # Ended polls serve their results from the snapshot
+            queryset = queryset.select_related('result_snapshot')
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'create':
             return CreatePollSerializer
@@ -101,7 +124,8 @@ class PollViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_classes=[VoteRateThrottle, PollVoteRateThrottle])
     def vote(self, request, pk=None):
         poll = self.get_object()
         serializer = VoteSerializer(data=request.data, context={'request': request})
@@ -110,18 +134,78 @@ class PollViewSet(viewsets.ModelViewSet):
             return Response({"message": "Vote submitted"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def retrieve(self, request, *args, **kwargs):
+        # Load the poll first so a cached payload never skips the 404 and
+        # permission checks
+        poll = self.get_object()
+        return Response(get_poll_detail(poll.pk, poll))
+
+    @action(detail=True, methods=['post'],
+            permission_classes=[permissions.IsAuthenticated, IsPollCreatorOrAdmin])
+    def close_poll(self, request, pk=None):
+        """End the poll now and snapshot its final results"""
+        poll = self.get_object()
+        # Store the votes this worker accepted before the poll closed
+        vote_buffer.flush()
+        with transaction.atomic():
+            poll.end_time = timezone.now()
+            poll.is_active = False
+            poll.save()
+            take_snapshots([poll.id])
+            announce_closed([poll.id])
+        return Response({"detail": "Poll closed successfully."})
+
     @action(detail=True, methods=['get'], url_path='results')
     def results(self, request, pk=None):
         poll = self.get_object()
-        results = poll.get_results()
-        return Response(results)
+        return Response(get_poll_results(poll.pk, poll))
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser],
+            # IsAdminUser needs the real user, not the token claims
+            authentication_classes=[CachedJWTAuthentication, SessionAuthentication])
+    def export(self, request, pk=None):
+        """Stream the poll's raw votes or per-option results.
+
+        ``?type=votes|results`` picks the data and ``?output=csv|ndjson``
+        the format. Rows are streamed as they are read from the database,
+        under ASGI through an async iterator.
+        """
+        export_type = request.query_params.get('type', 'votes')
+        output = request.query_params.get('output', 'csv')
+        if export_type not in ('votes', 'results') or output not in ('csv', 'ndjson'):
+            return Response({"error": "Use type=votes|results and output=csv|ndjson"},
+                           status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'], url_path='cast-vote')
+        poll = self.get_object()
+        if export_type == 'votes':
+            fields, rows = VOTE_EXPORT_FIELDS, iter_vote_rows(poll.id)
+        else:
+            fields, rows = RESULT_EXPORT_FIELDS, iter_result_rows(poll)
+
+        if output == 'csv':
+            content, content_type = stream_csv(fields, rows), 'text/csv'
+        else:
+            content, content_type = stream_ndjson(fields, rows), 'application/x-ndjson'
+        if isinstance(request._request, ASGIRequest):
+            # Served from the event loop, which would otherwise read the
+            # whole sync iterator into a list before sending anything
+            content = aiter_in_chunks(content, settings.EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        extension = 'csv' if output == 'csv' else 'ndjson'
+        response['Content-Disposition'] = (
+            f'attachment; filename="poll-{poll.id}-{export_type}.{extension}"'
+        )
+        return response
+
+    @action(detail=True, methods=['post'], url_path='cast-vote',
+            throttle_classes=[VoteRateThrottle, PollVoteRateThrottle])
     def cast_vote(self, request, pk=None):
         """Cast a vote with confirmation"""
         poll = self.get_object()
         
-        if not poll.is_active:
+        # is_active is only updated by the scheduler's next sweep, so check
+        # the poll's window as well
+        if not poll.is_currently_active:
             return Response({"error": "This poll is not active"}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
@@ -130,28 +214,34 @@ class PollViewSet(viewsets.ModelViewSet):
             return Response({"error": "No option selected"}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if user already voted
-        if poll.votes.filter(user=request.user).exists():
-            return Response({"error": "You already voted in this poll"}, 
-                           status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create vote
         try:
             option = poll.options.get(id=option_id)
-            vote = Vote.objects.create(
-                poll=poll,
-                option=option,
-                user=request.user
-            )
-            # Return confirmation
-            return Response({
-                "message": "Vote recorded successfully",
-                "confirmation_id": vote.id,
-                "timestamp": vote.voted_at
-            })
-        except:
+        except (Option.DoesNotExist, ValueError):
             return Response({"error": "Invalid option"}, 
                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if settings.VOTE_INGESTION_MODE == 'buffered':
+            # Duplicates are rejected against the cache now, the row is
+            # written by the next batch flush
+            if not vote_buffer.submit(poll.id, option.id, request.user.id):
+                return Response({"error": "You already voted in this poll"}, 
+                               status=status.HTTP_400_BAD_REQUEST)
+            return Response({"message": "Vote accepted"}, 
+                           status=status.HTTP_202_ACCEPTED)
+        
+        # The (poll, user) unique constraint rejects a second vote, so there
+        # is no separate "already voted" query
+        vote = create_vote(poll, option, request.user)
+        if vote is None:
+            return Response({"error": "You already voted in this poll"}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        # Return confirmation
+        return Response({
+            "message": "Vote recorded successfully",
+            "confirmation_id": vote.id,
+            "timestamp": vote.voted_at
+        })
 
 class OptionViewSet(viewsets.ModelViewSet):
     queryset = Option.objects.all()
@@ -181,6 +271,7 @@ class PollListCreateView(generics.ListCreateAPIView):
 class FilteredPollListView(generics.ListAPIView):
     queryset = Poll.objects.all()
     serializer_class = PollSerializer
+    pagination_class = PollCursorPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['is_active', 'created_by']
@@ -188,15 +279,19 @@ class FilteredPollListView(generics.ListAPIView):
 class PollResultsView(generics.RetrieveAPIView):
     queryset = Poll.objects.all()
     serializer_class = PollSerializer
+    authentication_classes = [TokenClaimsJWTAuthentication, SessionAuthentication]
     permission_classes = [permissions.AllowAny]
 
     def retrieve(self, request, *args, **kwargs):
-        poll_id = self.kwargs.get("poll_id")
-        poll = Poll.objects.get(id=poll_id)
-        options = Option.objects.filter(poll=poll).annotate(vote_count=Count('vote'))
-        results = {option.text: option.vote_count for option in options}
+        poll = get_object_or_404(
+            Poll.objects.select_related('result_snapshot'), id=self.kwargs.get("poll_id")
+        )
+        results = {
+            option['text']: option['votes']
+            for option in get_poll_results(poll.id, poll)['results']
+        }
         return Response({
-            "poll": PollSerializer(poll).data,
+            "poll": get_poll_detail(poll.id, poll),
             "results": results
         })
 
@@ -0,0 +1,21 @@
+from django.db import IntegrityError, transaction
+
+from .models import Vote
+
+
+def create_vote(poll, option, user):
+    """Insert a vote, returning None if the user already voted in the poll.
+
+    The (poll, user) unique constraint rejects duplicates without a prior
+    query; only when the insert fails is the existing vote looked up, so any
+    other integrity error is raised rather than reported as a duplicate.
+    The insert runs in a savepoint, so a failed one leaves the caller's
+    transaction usable for that lookup.
+    """
+    try:
+        with transaction.atomic():
+            return Vote.objects.create(poll=poll, option=option, user=user)
+    except IntegrityError:
+        if Vote.objects.filter(poll=poll, user=user).exists():
+            return None
+        raise
@@ -1,4 +1,5 @@
 import os
+import sys
 import django
 
 # Setup Django
@@ -10,47 +11,55 @@ from polls.models import Poll, Option, Vote
 from django.utils import timezone
 from datetime import timedelta
 
+def get_or_create_user(username, password, **fields):
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        user = User.objects.create_user(username=username, password=password, **fields)
+    return user
+
 def populate_database():
-    # Create  users
-    admin = User.objects.create_user(
-        username='admin',
+    # Create  users (re-running the script reuses existing rows)
+    admin = get_or_create_user(
+        'admin',
+        'admin123',
         email='admin@chaguasmart.com',
-        password='admin123',
         is_admin=True,
         campus='Main'
     )
     
-    student1 = User.objects.create_user(
-        username='student1',
+    student1 = get_or_create_user(
+        'student1',
+        'student123',
         email='student1@chaguasmart.com',
-        password='student123',
         campus='Main'
     )
     
-    student2 = User.objects.create_user(
-        username='student2',
+    student2 = get_or_create_user(
+        'student2',
+        'student123',
         email='student2@chaguasmart.com',
-        password='student123',
         campus='North'
     )
     
     # Create a poll
-    poll = Poll.objects.create(
+    poll, created = Poll.objects.get_or_create(
         title='Student President Election 2024',
-        description='Vote for your next student body president',
         created_by=admin,
-        start_time=timezone.now(),
-        end_time=timezone.now() + timedelta(days=7)
+        defaults={
+            'description': 'Vote for your next student body president',
+            'start_time': timezone.now(),
+            'end_time': timezone.now() + timedelta(days=7),
+        }
     )
     
     # Add options
-    option1 = Option.objects.create(poll=poll, text='Alice Johnson')
-    option2 = Option.objects.create(poll=poll, text='Bob Smith')
-    option3 = Option.objects.create(poll=poll, text='Carol Davis')
+    option1, _ = Option.objects.get_or_create(poll=poll, text='Alice Johnson')
+    option2, _ = Option.objects.get_or_create(poll=poll, text='Bob Smith')
+    option3, _ = Option.objects.get_or_create(poll=poll, text='Carol Davis')
     
     # Add some votes
-    Vote.objects.create(user=student1, poll=poll, option=option1)
-    Vote.objects.create(user=student2, poll=poll, option=option2)
+    Vote.objects.get_or_create(user=student1, poll=poll, defaults={'option': option1})
+    Vote.objects.get_or_create(user=student2, poll=poll, defaults={'option': option2})
     
     print("Database populated successfully!")
     print(f"Created {User.objects.count()} users")
@@ -58,5 +67,21 @@ def populate_database():
     print(f"Created {Option.objects.count()} options")
     print(f"Created {Vote.objects.count()} votes")
 
+def populate_benchmark_database():
+    # Thousands of users, hundreds of polls and 100k votes, for the query
+    # budget and latency benchmarks (manage.py benchmark_endpoints). For
+    # larger volumes use manage.py generate_load_data
+    from polls.seeding import seed_benchmark_data
+    seed_benchmark_data()
+
+    print("Benchmark database populated successfully!")
+    print(f"Created {User.objects.count()} users")
+    print(f"Created {Poll.objects.count()} polls")
+    print(f"Created {Option.objects.count()} options")
+    print(f"Created {Vote.objects.count()} votes")
+
 if __name__ == '__main__':
-    populate_database()
\ No newline at end of file
+    if '--benchmark' in sys.argv:
+        populate_benchmark_database()
+    else:
+        populate_database()
\ No newline at end of file
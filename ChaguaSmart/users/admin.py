@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User  # Only import User from users.models
+from .models import LoginHistory, User
 
 
 class CustomUserAdmin(UserAdmin):
@@ -27,6 +27,15 @@ class CustomUserAdmin(UserAdmin):
 # Register User model - ONLY REGISTER ONCE
 admin.site.register(User, CustomUserAdmin)
 
+
+@admin.register(LoginHistory)
+class LoginHistoryAdmin(admin.ModelAdmin):
+    list_display = ('username', 'successful', 'ip_address', 'created_at')
+    list_filter = ('successful', 'created_at')
+    search_fields = ('username', 'ip_address')
+    readonly_fields = ('user', 'username', 'ip_address', 'user_agent', 'successful', 'created_at')
+
+
 # Customize admin site header and title
 admin.site.site_header = "ChaguaSmart Administration"
 admin.site.site_title = "ChaguaSmart Admin"
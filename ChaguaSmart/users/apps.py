@@ -7,4 +7,5 @@ class UsersConfig(AppConfig):
 
     def ready(self):
         # Import signals or do other initialization
-        import users.signals
\ No newline at end of file
+        import users.signals
+        import users.checks  # noqa: F401
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config.batching import BatchBuffer
+
+from .models import LoginHistory
+
+logger = logging.getLogger(__name__)
+
+
+def failed_login_key(username):
+    # Failed attempts can carry any text as the username, so hash it into
+    # a key every cache backend accepts
+    digest = hashlib.md5(username.lower().encode()).hexdigest()
+    return f'failed_logins_{digest}'
+
+
+class LoginAuditBuffer(BatchBuffer):
+    """Queue login attempts in memory and write them with ``bulk_create``"""
+
+    def __init__(self, flush_size=None, flush_interval=None):
+        super().__init__(
+            flush_size or settings.LOGIN_AUDIT_FLUSH_SIZE,
+            flush_interval or settings.LOGIN_AUDIT_FLUSH_INTERVAL,
+        )
+
+    def write(self, items):
+        LoginHistory.objects.bulk_create(items, batch_size=self.flush_size)
+
+
+login_audit = LoginAuditBuffer()
+
+
+def _client_details(request):
+    if request is None:
+        return None, ''
+    return (
+        request.META.get('REMOTE_ADDR') or None,
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+def record_login(user, request=None):
+    """Queue a successful login and reset the user's failed-attempt count"""
+    ip, user_agent = _client_details(request)
+    login_audit.add(LoginHistory(
+        user_id=user.pk, username=user.get_username(),
+        ip_address=ip, user_agent=user_agent, successful=True,
+    ))
+    cache.delete(failed_login_key(user.get_username()))
+
+
+def record_failed_login(username, request=None):
+    """Queue a failed login and return the recent failures for the username.
+
+    Failures are counted in the cache over a window of
+    ``FAILED_LOGIN_WINDOW`` seconds from the first failure, and a warning
+    is logged once the count reaches ``FAILED_LOGIN_ALERT_THRESHOLD``.
+    """
+    ip, user_agent = _client_details(request)
+    login_audit.add(LoginHistory(
+        username=username[:150], ip_address=ip,
+        user_agent=user_agent, successful=False,
+    ))
+
+    key = failed_login_key(username)
+    cache.add(key, 0, settings.FAILED_LOGIN_WINDOW)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr()
+        cache.set(key, 1, settings.FAILED_LOGIN_WINDOW)
+        failures = 1
+
+    if failures >= settings.FAILED_LOGIN_ALERT_THRESHOLD:
+        logger.warning(
+            "%d failed login attempts for username %r, latest from IP %s",
+            failures, username, ip
+        )
+    return failures
+
+
+def get_failed_login_count(username):
+    return cache.get(failed_login_key(username), 0)
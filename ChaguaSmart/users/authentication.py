@@ -0,0 +1,156 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+CAMPUS_CLAIM = 'campus'
+IS_ADMIN_CLAIM = 'is_admin'
+
+
+def user_cache_key(user_id):
+    # users/signals.py deletes this key whenever the user is saved
+    return f'user_{user_id}'
+
+
+def claims_changed_key(user_id):
+    return f'user_{user_id}_claims_changed'
+
+
+def forget_users(user_ids):
+    """Drop the cached rows of users written without the model signals,
+    such as by ``bulk_create``"""
+    cache.delete_many(
+        [user_cache_key(user_id) for user_id in user_ids]
+        + [f'user_{user_id}_profile' for user_id in user_ids]
+    )
+
+
+def mark_claims_changed(user_ids):
+    """Stop trusting the campus and admin claims of tokens already issued to
+    ``user_ids``, whose values have changed.
+
+    Until those tokens expire, reads authenticated with them load the user
+    row like writes do.
+    """
+    changed_at = int(time.time())
+    cache.set_many(
+        {claims_changed_key(user_id): changed_at for user_id in user_ids},
+        api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+    )
+
+
+def get_token_user_id(request):
+    """The user id from the request's bearer token, if it is valid.
+
+    Only the signature and expiry are checked, without a database hit, for
+    code running before the view authenticates the request.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+class CampusRefreshToken(RefreshToken):
+    """Refresh token carrying the user's campus and admin flag as claims.
+
+    Access tokens derived from it copy the claims, so they survive refreshes.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[CAMPUS_CLAIM] = user.campus
+        token[IS_ADMIN_CLAIM] = user.is_admin
+        return token
+
+
+class CampusTokenUser(TokenUser):
+    """Stateless user built from the token claims, without a database hit"""
+
+    @cached_property
+    def campus(self):
+        return self.token.get(CAMPUS_CLAIM, '')
+
+    @cached_property
+    def is_admin(self):
+        return self.token.get(IS_ADMIN_CLAIM, False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that caches the user row for ``USER_CACHE_TTL``.
+
+    Repeat requests from the same user skip the ``users_user`` SELECT. The
+    cached user is dropped whenever it is saved, so deactivation and
+    password changes take effect on the next request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.USER_CACHE_TTL)
+            return user
+
+        # Repeat the checks super().get_user() makes on a fresh row
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+
+class TokenClaimsJWTAuthentication(CachedJWTAuthentication):
+    """Authenticate read-only requests from the token claims alone.
+
+    For safe methods, tokens issued with ``CampusRefreshToken`` resolve to a
+    ``CampusTokenUser`` exposing ``id``, ``campus`` and ``is_admin`` without
+    any lookup. Writes, and tokens without the claims, get the real user
+    through ``CachedJWTAuthentication``, as do tokens issued before the
+    user's campus or admin flag last changed (see ``mark_claims_changed``),
+    which costs one cache read per request. Meant for read-heavy views that
+    only need the user's identity; a deactivated user keeps read access
+    until their access token expires.
+    """
+
+    def authenticate(self, request):
+        self.claims_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if (self.claims_only
+                and api_settings.USER_ID_CLAIM in validated_token
+                and CAMPUS_CLAIM in validated_token
+                and IS_ADMIN_CLAIM in validated_token):
+            changed_at = cache.get(claims_changed_key(validated_token[api_settings.USER_ID_CLAIM]))
+            if changed_at is None or validated_token.get('iat', 0) > changed_at:
+                return CampusTokenUser(validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from rest_framework.settings import api_settings
+
+from config.checks import cache_is_atomic
+
+
+@register()
+def check_throttle_cache(app_configs, **kwargs):
+    """The sliding-window throttles count requests with cache.incr, which is
+    only atomic across workers on Redis or Memcached.
+
+    Only a warning under DEBUG, so local runs work on the default
+    file-based cache.
+    """
+    if not any(api_settings.DEFAULT_THROTTLE_RATES.values()) or cache_is_atomic():
+        return []
+    if settings.DEBUG:
+        return [Warning(
+            "Throttle counts are approximate: the default cache is not Redis or Memcached.",
+            hint="Set CACHE_LOCATION to a Redis server before deploying.",
+            id='users.W001',
+        )]
+    return [Error(
+        "Throttle rates are set but the default cache is not Redis or Memcached.",
+        hint=(
+            "SlidingWindowRateThrottle counts requests with cache.incr(), which "
+            "other backends implement as a read followed by a write, so "
+            "concurrent requests are lost from the count. Set CACHE_BACKEND to "
+            "Redis or Memcached, or clear DEFAULT_THROTTLE_RATES."
+        ),
+        id='users.E001',
+    )]
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.roster import import_roster, iter_roster_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSONL roster (username, email, campus) and upsert its users"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Roster file; CSV needs a header row")
+        parser.add_argument(
+            '--input', choices=['csv', 'jsonl'],
+            help="Roster format (defaults to the file extension)",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['input'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        try:
+            roster = open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f"Cannot open roster: {e}")
+        with roster:
+            result = import_roster(
+                iter_roster_rows(roster, fmt), batch_size=options['batch_size']
+            )
+
+        for error in result['errors']:
+            messages = '; '.join(
+                f"{field}: {' '.join(field_errors)}"
+                for field, field_errors in error['errors'].items()
+            )
+            self.stderr.write(f"Line {error['line']}: {messages}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} user(s), updated {result['updated']}, "
+            f"{len(result['errors'])} row(s) rejected."
+        ))
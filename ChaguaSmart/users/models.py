@@ -1,8 +1,11 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
+from config.tracking import FieldTrackingMixin
 
-class User(AbstractUser):
+
+class User(FieldTrackingMixin, AbstractUser):
 
     groups = models.ManyToManyField(
         'auth.Group',
@@ -22,5 +25,37 @@ class User(AbstractUser):
     is_admin = models.BooleanField(default=False)
     campus = models.CharField(max_length=100)
 
+    # Fields whose changes users/signals.py reacts to
+    TRACKED_FIELDS = ('email', 'campus', 'is_admin')
+
+    def __str__(self):
+        return self.username
+
+
+class LoginHistory(models.Model):
+    """One login attempt, written in batches by users.audit"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='login_history'
+    )
+    # Kept for failed attempts, which may not match any user
+    username = models.CharField(max_length=150)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(blank=True)
+    successful = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Login history"
+        indexes = [
+            models.Index(fields=['username', 'created_at']),
+            models.Index(fields=['ip_address', 'created_at']),
+        ]
+
     def __str__(self):
-        return self.username
\ No newline at end of file
+        outcome = "logged in" if self.successful else "failed to log in"
+        return f"{self.username} {outcome} at {self.created_at}"
@@ -0,0 +1,271 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxLengthValidator, validate_email
+from django.db import transaction
+
+from .authentication import forget_users, mark_claims_changed
+
+User = get_user_model()
+
+ROSTER_FIELDS = ('username', 'email', 'campus', 'first_name', 'last_name', 'is_admin')
+
+_username_validator = UnicodeUsernameValidator()
+
+# Spellings of the is_admin column accepted from CSV and JSONL rosters
+_TRUE_VALUES = {'true', '1', 'yes'}
+_FALSE_VALUES = {'false', '0', 'no'}
+
+
+def _init_worker(settings_module):
+    # Workers started with "spawn" (macOS, Windows) do not inherit Django setup
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    if not apps.ready:
+        django.setup()
+
+
+class HashingPool:
+    """A process pool for ``hash_passwords`` shared by every batch of an
+    import.
+
+    The worker processes are started on first use, so imports whose batches
+    are all hashed inline never start them, and shut down when the ``with``
+    block exits.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes
+        self.executor = None
+
+    def map(self, passwords, chunksize):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+            )
+        return list(self.executor.map(make_password, passwords, chunksize=chunksize))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def hash_passwords(passwords, processes=None, chunksize=200, pool=None):
+    """Hash raw passwords with the configured hasher across a process pool.
+
+    Password hashing is CPU bound and holds the GIL, so the work is spread
+    over ``processes`` worker processes (default: one per CPU). Small
+    batches are hashed inline, where starting the pool would cost more than
+    it saves. Pass a ``HashingPool`` as ``pool`` to reuse its processes
+    across calls; otherwise one is started for this call. Returns the
+    hashes in input order.
+    """
+    passwords = list(passwords)
+    if processes == 1 or len(passwords) <= chunksize:
+        return [make_password(password) for password in passwords]
+
+    if pool is not None:
+        return pool.map(passwords, chunksize)
+    with HashingPool(processes) as pool:
+        return pool.map(passwords, chunksize)
+
+
+def create_roster_users(rows, processes=None, batch_size=1000):
+    """Create users from roster rows in bulk.
+
+    ``rows`` are dicts with a ``username`` and raw ``password`` plus any of
+    ``ROSTER_FIELDS``. Usernames that already exist, or repeat earlier in
+    the roster, are skipped. Passwords are hashed with ``hash_passwords``
+    and users inserted with ``bulk_create``, so the user signals do not run.
+
+    Returns a tuple of the created and skipped counts.
+    """
+    seen = set()
+    new_rows = []
+    skipped = 0
+    rows = list(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        existing = set(
+            User.objects.filter(
+                username__in=[row['username'] for row in batch]
+            ).values_list('username', flat=True)
+        )
+        for row in batch:
+            if row['username'] in existing or row['username'] in seen:
+                skipped += 1
+                continue
+            seen.add(row['username'])
+            new_rows.append(row)
+
+    hashes = hash_passwords((row['password'] for row in new_rows), processes=processes)
+    users = [
+        User(
+            password=password_hash,
+            **{field: row[field] for field in ROSTER_FIELDS if field in row}
+        )
+        for row, password_hash in zip(new_rows, hashes)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+
+    return len(users), skipped
+
+
+def iter_roster_rows(stream, fmt='csv'):
+    """Yield ``(line_number, row)`` pairs from a CSV or JSONL roster.
+
+    ``stream`` is a binary file object and is read incrementally, so a
+    roster of any size is never loaded into memory. CSV rosters need a
+    header row. Rows that cannot be parsed are yielded with ``row`` set to
+    the parse error message.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, "Expected a JSON object"
+                continue
+            yield line_number, row
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _validate_roster_row(row):
+    errors = {}
+    username = str(row.get('username') or '').strip()
+    email = str(row.get('email') or '').strip()
+    campus = str(row.get('campus') or '').strip()
+
+    if not username:
+        errors['username'] = ["This field is required."]
+    else:
+        try:
+            _username_validator(username)
+            MaxLengthValidator(150)(username)
+        except ValidationError as e:
+            errors['username'] = e.messages
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError as e:
+            errors['email'] = e.messages
+    if len(campus) > 100:
+        errors['campus'] = ["Ensure this field has no more than 100 characters."]
+
+    cleaned = {'username': username, 'email': email, 'campus': campus}
+    is_admin = str(row.get('is_admin', '')).strip().lower()
+    if is_admin in _TRUE_VALUES or is_admin in _FALSE_VALUES:
+        cleaned['is_admin'] = is_admin in _TRUE_VALUES
+    elif is_admin:
+        errors['is_admin'] = ["Must be a valid boolean."]
+    for field in ('first_name', 'last_name', 'password'):
+        if row.get(field):
+            cleaned[field] = str(row[field])
+    return cleaned, errors
+
+
+def import_roster(rows, batch_size=1000, processes=None):
+    """Upsert users from ``(line_number, row)`` pairs, one batch at a time.
+
+    New usernames are inserted and existing ones get their email, campus and
+    admin flag updated with a single ``bulk_create(update_conflicts=True)``
+    per batch; rows without an ``is_admin`` value keep the stored one.
+    Passwords are only set for new users: hashed with ``hash_passwords``
+    when the row has one, unusable otherwise. All batches share one
+    ``HashingPool``. The cached rows of updated users are dropped
+    after each batch, and their tokens' claims distrusted where the campus
+    or admin flag changed. Invalid rows are skipped and
+    reported, along with rows repeating a username within the same batch.
+
+    Returns a dict with ``created``, ``updated`` and ``errors`` (a list of
+    ``{"line": ..., "errors": ...}``).
+    """
+    result = {'created': 0, 'updated': 0, 'errors': []}
+    batch = {}
+
+    def write_batch():
+        existing = {
+            username: (user_id, campus, is_admin)
+            for username, user_id, campus, is_admin in User.objects.filter(
+                username__in=list(batch)
+            ).values_list('username', 'id', 'campus', 'is_admin')
+        }
+        for username, (_, _, is_admin) in existing.items():
+            # is_admin is in update_fields, so a row without it keeps the stored value
+            batch[username].setdefault('is_admin', is_admin)
+        new_passwords = [
+            row['password'] for username, row in batch.items()
+            if username not in existing and 'password' in row
+        ]
+        hashes = iter(hash_passwords(new_passwords, processes=processes, pool=pool))
+
+        users = []
+        for username, row in batch.items():
+            # The password is not in update_fields, so existing users keep theirs
+            if username not in existing and 'password' in row:
+                password_hash = next(hashes)
+            else:
+                password_hash = make_password(None)
+            users.append(User(
+                password=password_hash,
+                **{field: row[field] for field in ROSTER_FIELDS if field in row}
+            ))
+        User.objects.bulk_create(
+            users,
+            update_conflicts=True,
+            unique_fields=['username'],
+            update_fields=['email', 'campus', 'is_admin'],
+        )
+        # bulk_create skips the user signals, so drop what they would have
+        forget_users([user_id for user_id, _, _ in existing.values()])
+        mark_claims_changed([
+            user_id for username, (user_id, campus, is_admin) in existing.items()
+            if (batch[username]['campus'], batch[username]['is_admin']) != (campus, is_admin)
+        ])
+        result['created'] += len(users) - len(existing)
+        result['updated'] += len(existing)
+        batch.clear()
+
+    with HashingPool(processes) as pool:
+        for line_number, row in rows:
+            if isinstance(row, str):
+                result['errors'].append({'line': line_number, 'errors': {'row': [row]}})
+                continue
+            cleaned, errors = _validate_roster_row(row)
+            if not errors and cleaned['username'] in batch:
+                errors = {'username': ["Duplicate username in roster."]}
+            if errors:
+                result['errors'].append({'line': line_number, 'errors': errors})
+                continue
+
+            batch[cleaned['username']] = cleaned
+            if len(batch) >= batch_size:
+                write_batch()
+        if batch:
+            write_batch()
+
+    return result
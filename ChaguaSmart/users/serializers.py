@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .audit import record_login
+from .authentication import CampusRefreshToken
 
 User = get_user_model()
 
@@ -42,4 +46,24 @@ class RegisterSerializer(serializers.ModelSerializer):
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
         )
-        return user
\ No newline at end of file
+        return user
+
+class RosterUserSerializer(serializers.Serializer):
+    """One student in a bulk roster import"""
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    password = serializers.CharField(write_only=True)
+    campus = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+
+
+class CampusTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issue tokens with campus and is_admin claims"""
+    token_class = CampusRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Failed attempts are recorded by the user_login_failed signal
+        record_login(self.user, self.context.get('request'))
+        return data
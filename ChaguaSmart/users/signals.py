@@ -1,10 +1,16 @@
+import logging
+
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
 
+from .audit import record_failed_login, record_login
+from .authentication import mark_claims_changed
+
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
 
@@ -14,41 +20,56 @@ def user_created_or_updated(sender, instance, created, **kwargs):
     # Clear user cache
     cache.delete(f'user_{instance.id}')
     cache.delete(f'user_{instance.id}_profile')
+
+    # What was just written is the new baseline for change tracking
+    instance.snapshot_tracked_fields()
     
     if created:
         # Log new user
-        campus_info = getattr(instance, 'campus', 'Not specified')
-        print(f"New user registered: {instance.username} ({instance.email}) from campus {campus_info}")
+        logger.info("User %s registered", instance.id)
         
         #  create a profile, send welcome email, etc.
         # create_user_profile(instance)
         # send_welcome_email(instance)
     else:
         # For updates
-        print(f"User updated: {instance.username} ({instance.email})")
+        logger.debug("User %s updated", instance.id)
 
 
 @receiver(pre_save, sender=User)
-def user_about_to_save(sender, instance, **kwargs):
+def user_about_to_save(sender, instance, update_fields=None, **kwargs):
     """Handle actions before a user is saved"""
-    if instance.pk:  
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            
-            # If email changed, you might want to mark it unverified
-            if old_instance.email != instance.email:
-                # Set a flag for email verification if you have one
-                # instance.email_verified = False
-                print(f"User {instance.username} changed email from {old_instance.email} to {instance.email}")
-            
-            # If campus changed, check safely if the attribute exists
-            if hasattr(old_instance, 'campus') and hasattr(instance, 'campus'):
-                if getattr(old_instance, 'campus', None) != getattr(instance, 'campus', None):
-                    print(f"User {instance.username} changed campus from {getattr(old_instance, 'campus', 'None')} to {getattr(instance, 'campus', 'None')}")
-                
-        except User.DoesNotExist:
-            
-            pass
+    if not instance.pk:
+        return
+    # Saves that cannot touch the tracked fields, like the last_login
+    # update on every login, skip the check entirely
+    if update_fields is not None and not set(update_fields) & set(User.TRACKED_FIELDS):
+        return
+
+    changed = instance.get_changed_fields()
+    if changed is None:
+        # Not loaded from the database, so compare against the stored row
+        old_instance = User.objects.filter(pk=instance.pk).only(*User.TRACKED_FIELDS).first()
+        if old_instance is None:
+            return
+        changed = {
+            field for field in User.TRACKED_FIELDS
+            if getattr(old_instance, field) != getattr(instance, field)
+        }
+
+    # If email changed, you might want to mark it unverified
+    if 'email' in changed:
+        # Set a flag for email verification if you have one
+        # instance.email_verified = False
+        logger.info("User %s changed email", instance.pk)
+
+    # Both are carried as token claims (see CampusRefreshToken)
+    if changed & {'campus', 'is_admin'}:
+        mark_claims_changed([instance.pk])
+    if 'campus' in changed:
+        logger.info("User %s changed campus", instance.pk)
+    if 'is_admin' in changed:
+        logger.info("User %s changed admin flag", instance.pk)
 
 
 # Signal for password reset
@@ -58,23 +79,18 @@ try:
     @receiver(user_logged_in)
     def user_logged_in_callback(sender, request, user, **kwargs):
         """Handle successful login"""
-        # Update last login
-        user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
-        
-        # record IP, device, etc.
-        ip = request.META.get('REMOTE_ADDR', '')
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        print(f"User {user.username} logged in from IP: {ip} using: {user_agent}")
+        # last_login is saved by django.contrib.auth's update_last_login
+        # receiver, so it is not saved a second time here
         
-        # login history
-        # LoginHistory.objects.create(user=user, ip_address=ip, user_agent=user_agent)
+        # Record IP and device in the batched login history
+        record_login(user, request)
+        logger.info("User %s logged in", user.pk)
 
     @receiver(user_logged_out)
     def user_logged_out_callback(sender, request, user, **kwargs):
         """Handle logout"""
         if user:
-            print(f"User {user.username} logged out")
+            logger.info("User %s logged out", user.pk)
             
             # You could update session end time
             # update_session_end_time(user)
@@ -83,11 +99,10 @@ try:
     def user_login_failed_callback(sender, credentials, request, **kwargs):
         """Handle failed login attempt"""
         username = credentials.get('username', '')
-        ip = request.META.get('REMOTE_ADDR', '')
-        print(f"Failed login attempt for username: {username} from IP: {ip}")
-        
-        # could implement security measures
-        #track_failed_login_attempts(username, ip)
+        # Batched into the login history; the recent failure count is kept
+        # in the cache for brute-force monitoring
+        failures = record_failed_login(username, request)
+        logger.info("Failed login attempt %d for username %r", failures, username)
         
 except ImportError:
     
@@ -101,14 +116,14 @@ try:
     @receiver(password_changed)
     def password_changed_callback(sender, request, user, **kwargs):
         """Handle password change"""
-        print(f"Password changed for user: {user.username}")
+        logger.info("Password changed for user %s", user.pk)
         
     
 
     @receiver(password_reset)
     def password_reset_callback(sender, request, user, **kwargs):
         """Handle password reset"""
-        print(f"Password reset for user: {user.username}")
+        logger.info("Password reset for user %s", user.pk)
         
 
         
@@ -0,0 +1,441 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from polls.models import Poll
+from users.audit import get_failed_login_count, login_audit
+from users.authentication import CampusRefreshToken, TokenClaimsJWTAuthentication, user_cache_key
+from users.checks import check_throttle_cache
+from users.models import LoginHistory
+from users.roster import (
+    HashingPool, create_roster_users, hash_passwords, import_roster, iter_roster_rows
+)
+from users.throttles import LoginRateThrottle
+
+User = get_user_model()
+
+
+class RosterTests(TestCase):
+    """Test bulk roster provisioning"""
+
+    def test_hash_passwords_in_process_pool(self):
+        passwords = [f'secret{i}' for i in range(6)]
+
+        hashes = hash_passwords(passwords, processes=2, chunksize=2)
+
+        self.assertEqual(len(hashes), 6)
+        self.assertTrue(all(check_password(p, h) for p, h in zip(passwords, hashes)))
+
+    def test_hashing_pool_is_reused_across_calls(self):
+        with HashingPool(processes=2) as pool:
+            first = hash_passwords(['a1', 'a2', 'a3'], chunksize=2, pool=pool)
+            executor = pool.executor
+            second = hash_passwords(['b1', 'b2', 'b3'], chunksize=2, pool=pool)
+
+            self.assertIs(pool.executor, executor)
+        self.assertIsNone(pool.executor)
+        self.assertTrue(check_password('a3', first[2]))
+        self.assertTrue(check_password('b1', second[0]))
+
+    def test_create_roster_users_skips_existing_and_repeated(self):
+        User.objects.create_user(username='existing', password='pass123', campus='Main')
+        rows = [
+            {'username': 'existing', 'password': 'x', 'campus': 'Main'},
+            {'username': 'alice', 'password': 'alicepass', 'campus': 'North'},
+            {'username': 'bob', 'password': 'bobpass', 'campus': 'Main'},
+            {'username': 'alice', 'password': 'again', 'campus': 'Main'},
+        ]
+
+        created, skipped = create_roster_users(rows, processes=1)
+
+        self.assertEqual((created, skipped), (2, 2))
+        alice = User.objects.get(username='alice')
+        self.assertEqual(alice.campus, 'North')
+        self.assertTrue(alice.check_password('alicepass'))
+
+
+class StreamingRosterImportTests(TestCase):
+    """Test streaming CSV/JSONL roster upserts"""
+
+    def test_csv_rows_are_upserted_in_batches(self):
+        User.objects.create_user(
+            username='existing', password='keepme', email='old@example.com', campus='Main'
+        )
+        roster = BytesIO(
+            b"username,email,campus\n"
+            b"existing,new@example.com,North\n"
+            b"alice,alice@example.com,Main\n"
+            b"bob,bob@example.com,South\n"
+        )
+
+        result = import_roster(iter_roster_rows(roster, 'csv'), batch_size=2)
+
+        self.assertEqual(result, {'created': 2, 'updated': 1, 'errors': []})
+        existing = User.objects.get(username='existing')
+        self.assertEqual((existing.email, existing.campus), ('new@example.com', 'North'))
+        self.assertTrue(existing.check_password('keepme'))
+        self.assertFalse(User.objects.get(username='bob').has_usable_password())
+
+    def test_upserts_drop_cached_users_and_stale_claims(self):
+        cache.clear()
+        user = User.objects.create_user(username='existing', password='keepme', campus='Main')
+        token = CampusRefreshToken.for_user(user).access_token
+        cache.set(user_cache_key(user.id), user)
+
+        import_roster([(2, {'username': 'existing', 'campus': 'North'})])
+
+        self.assertIsNone(cache.get(user_cache_key(user.id)))
+        # The token says Main; reads now load the user instead
+        authentication = TokenClaimsJWTAuthentication()
+        authentication.claims_only = True
+        self.assertEqual(authentication.get_user(token).campus, 'North')
+
+    def test_roster_demotion_distrusts_admin_claims(self):
+        cache.clear()
+        user = User.objects.create_user(
+            username='existing', password='keepme', campus='Main', is_admin=True
+        )
+        token = CampusRefreshToken.for_user(user).access_token
+
+        import_roster([(2, {'username': 'existing', 'campus': 'Main', 'is_admin': 'false'})])
+
+        authentication = TokenClaimsJWTAuthentication()
+        authentication.claims_only = True
+        self.assertFalse(authentication.get_user(token).is_admin)
+
+    def test_rows_without_admin_flag_keep_it(self):
+        User.objects.create_user(username='existing', campus='Main', is_admin=True)
+
+        import_roster([(2, {'username': 'existing', 'campus': 'North'})])
+
+        self.assertTrue(User.objects.get(username='existing').is_admin)
+
+    def test_invalid_rows_are_reported_by_line(self):
+        roster = BytesIO(
+            b'{"username": "carol", "email": "carol@example.com", "campus": "Main"}\n'
+            b'{"username": "", "email": "x@example.com"}\n'
+            b'not json\n'
+            b'{"username": "dave", "email": "not-an-email"}\n'
+            b'{"username": "carol", "campus": "North"}\n'
+        )
+
+        result = import_roster(iter_roster_rows(roster, 'jsonl'))
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 4, 5])
+        self.assertIn('email', result['errors'][2]['errors'])
+        self.assertFalse(User.objects.filter(username='dave').exists())
+
+    def test_import_roster_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as roster:
+            roster.write(json.dumps({'username': 'erin', 'campus': 'East'}) + '\n')
+            roster.write(json.dumps({'username': 'bad name!'}) + '\n')
+        out, err = StringIO(), StringIO()
+
+        call_command('import_roster', roster.name, stdout=out, stderr=err)
+
+        self.assertEqual(User.objects.get(username='erin').campus, 'East')
+        self.assertIn("Created 1 user(s), updated 0, 1 row(s) rejected.", out.getvalue())
+        self.assertIn("Line 2: username:", err.getvalue())
+
+
+class RosterImportApiTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('users:roster-import')
+        self.admin = User.objects.create_user(
+            username='admin', password='pass123', campus='Main', is_staff=True
+        )
+
+    def test_admin_imports_roster(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(self.url, [
+            {'username': 'student1', 'password': 'pass123', 'campus': 'Main'},
+            {'username': 'student2', 'password': 'pass123', 'email': 's2@example.com'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 2, 'skipped': 0})
+        self.assertTrue(User.objects.get(username='student2').check_password('pass123'))
+
+    def test_students_cannot_import(self):
+        student = User.objects.create_user(username='student', password='pass123', campus='Main')
+        self.client.force_authenticate(student)
+
+        response = self.client.post(self.url, [], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_uploads_csv_roster(self):
+        self.client.force_authenticate(self.admin)
+        roster = SimpleUploadedFile(
+            'roster.csv', b"username,email,campus\nfrank,frank@example.com,Main\n,,\n"
+        )
+
+        response = self.client.post(self.url, {'file': roster}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['line'], 3)
+
+
+class TokenAuthenticationTests(APITestCase):
+    """Test the claims-carrying tokens and the cached JWT user lookup"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='student', password='pass123', campus='North', is_admin=True
+        )
+        self.poll = Poll.objects.create(
+            title='Auth Poll',
+            created_by=self.user,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(days=1)
+        )
+
+    def tearDown(self):
+        login_audit.flush()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_selects(self, queries):
+        return [q['sql'] for q in queries if 'FROM "users_user"' in q['sql']]
+
+    def test_obtained_tokens_carry_campus_claims(self):
+        response = self.client.post(
+            reverse('users:token_obtain_pair'),
+            {'username': 'student', 'password': 'pass123'},
+            format='json'
+        )
+
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['campus'], 'North')
+        self.assertTrue(access['is_admin'])
+
+    def test_reads_use_claims_without_user_lookup(self):
+        self.authenticate(CampusRefreshToken.for_user(self.user).access_token)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('polls:polls-results', kwargs={'pk': self.poll.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user_selects(queries), [])
+
+    def test_user_row_is_cached_between_requests(self):
+        self.authenticate(CampusRefreshToken.for_user(self.user).access_token)
+        url = reverse('users:api-root')
+
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user_selects(queries), [])
+
+    def test_demotion_distrusts_admin_claims(self):
+        token = CampusRefreshToken.for_user(self.user).access_token
+        self.assertTrue(token['is_admin'])
+
+        self.user.is_admin = False
+        self.user.save()
+
+        # The token still says admin; reads now load the demoted user instead
+        authentication = TokenClaimsJWTAuthentication()
+        authentication.claims_only = True
+        self.assertFalse(authentication.get_user(token).is_admin)
+
+    def test_deactivation_drops_cached_user(self):
+        self.authenticate(CampusRefreshToken.for_user(self.user).access_token)
+        url = reverse('users:api-root')
+        self.client.get(url)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserChangeTrackingTests(TestCase):
+    """Test in-memory change detection in the user pre_save signal"""
+
+    def setUp(self):
+        User.objects.create_user(
+            username='student', password='pass123', email='old@example.com', campus='Main'
+        )
+        self.user = User.objects.get(username='student')
+
+    def user_selects(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT')]
+
+    def test_last_login_save_skips_change_check(self):
+        self.user.last_login = timezone.now()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=['last_login'])
+
+        self.assertEqual(self.user_selects(queries), [])
+
+    def test_changes_are_detected_without_reloading(self):
+        self.user.campus = 'North'
+
+        with CaptureQueriesContext(connection) as queries, \
+                self.assertLogs('users.signals', 'INFO') as logs:
+            self.user.save()
+
+        self.assertEqual(self.user_selects(queries), [])
+        self.assertEqual(logs.output, [f"INFO:users.signals:User {self.user.pk} changed campus"])
+
+    def test_snapshot_is_refreshed_after_save(self):
+        self.user.email = 'new@example.com'
+        self.user.save()
+
+        self.assertEqual(self.user.get_changed_fields(), set())
+
+
+class LoginAuditTests(APITestCase):
+    """Test the batched login history and failed-attempt counter"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('users:token_obtain_pair')
+        self.user = User.objects.create_user(username='student', password='pass123', campus='Main')
+
+    def tearDown(self):
+        login_audit.flush()
+
+    def login(self, password):
+        return self.client.post(
+            self.url, {'username': 'student', 'password': password},
+            format='json', REMOTE_ADDR='10.0.0.7', HTTP_USER_AGENT='pytest'
+        )
+
+    def test_logins_are_written_in_batches(self):
+        self.login('wrong')
+        response = self.login('pass123')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(LoginHistory.objects.exists())
+
+        with self.assertNumQueries(1):
+            login_audit.flush()
+
+        failed, succeeded = LoginHistory.objects.order_by('created_at')
+        self.assertFalse(failed.successful)
+        self.assertIsNone(failed.user)
+        self.assertEqual(succeeded.user, self.user)
+        self.assertEqual((succeeded.ip_address, succeeded.user_agent), ('10.0.0.7', 'pytest'))
+
+    def test_failed_attempts_are_counted_until_success(self):
+        for _ in range(3):
+            self.login('wrong')
+        self.assertEqual(get_failed_login_count('student'), 3)
+
+        self.login('pass123')
+
+        self.assertEqual(get_failed_login_count('student'), 0)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+        'login': '4/min',
+        'login_username': '2/min',
+        'register': '1/hour',
+    },
+})
+class ThrottleTests(APITestCase):
+    """Test the sliding-window throttles on the login and sign-up endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='student', password='pass123', campus='Main')
+
+    def tearDown(self):
+        login_audit.flush()
+
+    def login(self, username, address='10.0.0.1'):
+        return self.client.post(
+            reverse('users:token_obtain_pair'),
+            {'username': username, 'password': 'wrong'},
+            format='json', REMOTE_ADDR=address
+        )
+
+    def test_login_throttled_per_username_before_any_query(self):
+        self.login('student', '10.0.0.1')
+        self.login('student', '10.0.0.2')
+
+        with self.assertNumQueries(0):
+            response = self.login('student', '10.0.0.3')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        # Other usernames are unaffected
+        self.assertEqual(self.login('other').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_throttled_per_ip(self):
+        for i in range(4):
+            self.assertEqual(self.login(f'user{i}').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(self.login('user5').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.login('user5', '10.0.0.9').status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_register_throttled_per_ip(self):
+        url = reverse('users:register')
+        data = {'username': 'new1', 'email': 'new1@example.com', 'password': 'Strong-pass-123'}
+        self.assertEqual(self.client.post(url, data, format='json').status_code,
+                         status.HTTP_201_CREATED)
+
+        data.update(username='new2', email='new2@example.com')
+        with self.assertNumQueries(0):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        request = Request(RequestFactory().post('/', REMOTE_ADDR='10.0.0.1'))
+
+        def request_at(now):
+            throttle = LoginRateThrottle()
+            throttle.timer = lambda: now
+            return throttle.allow_request(request, None)
+
+        # Four requests late in one window fill the limit
+        self.assertTrue(all(request_at(120 + 50) for _ in range(4)))
+        self.assertFalse(request_at(120 + 55))
+        # Early in the next window most of them still count...
+        self.assertFalse(request_at(180 + 5))
+        # ...and once the previous window has mostly slid out, requests pass
+        self.assertTrue(request_at(180 + 50))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(settings.BASE_DIR / 'cache'),
+    }})
+    def test_throttles_need_an_atomic_cache(self):
+        errors = check_throttle_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['users.E001'])
+        with self.settings(DEBUG=True):
+            self.assertEqual([error.id for error in check_throttle_cache(None)], ['users.W001'])
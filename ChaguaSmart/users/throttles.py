@@ -0,0 +1,135 @@
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .authentication import get_token_user_id
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Sliding-window rate limit kept in the shared cache.
+
+    Each client has one counter per fixed window, bumped with ``cache.incr``.
+    That only counts every request from concurrent workers on Redis or
+    Memcached, where ``incr`` is one atomic operation; other backends read
+    and write the counter separately and lose increments, so the
+    ``users.E001`` system check refuses them. The request rate is the
+    current window's count plus the previous window's count, weighted by
+    how much of the previous window still overlaps the sliding one. This
+    takes three cache round trips instead of storing a timestamp list per
+    client like ``SimpleRateThrottle``.
+
+    Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope]``.
+    Rejected requests are counted too, so a client that keeps retrying
+    stays throttled. Subclasses implement ``get_ident_for(request, view)``;
+    returning None skips the throttle.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    def get_rate(self):
+        # Read on every instantiation so overridden settings apply
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def get_ident_for(self, request, view):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def get_token_user_id(self, request):
+        """The user id from a valid bearer token, without a database hit.
+
+        Throttles run before authentication (see ``ThrottleFirstMixin``), so
+        ``request.user`` is not available yet.
+        """
+        return get_token_user_id(request)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        current_key = f'{self.key}_{int(window)}'
+        self.previous = self.cache.get(f'{self.key}_{int(window) - 1}', 0)
+
+        # Keep each counter for the window after it, where it is the previous one
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # The counter was evicted between add() and incr()
+            self.cache.set(current_key, 1, self.duration * 2)
+            self.current = 1
+
+        overlap = 1 - self.elapsed / self.duration
+        return self.previous * overlap + self.current <= self.num_requests
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        if self.current > self.num_requests or not self.previous:
+            # Only the next window frees up capacity
+            return remaining
+        # Wait until enough of the previous window has slid out
+        excess = self.previous * (1 - self.elapsed / self.duration) + self.current - self.num_requests
+        return min(remaining, excess / self.previous * self.duration)
+
+
+class ThrottleFirstMixin:
+    """Check throttles before authentication and permissions.
+
+    DRF throttles after authenticating, which can mean a user lookup for
+    every request, including the ones that end up throttled. Throttles used
+    with this mixin cannot rely on ``request.user``.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        self.check_throttles(request)
+        self.perform_authentication(request)
+        self.check_permissions(request)
+
+
+class LoginRateThrottle(SlidingWindowRateThrottle):
+    """Limit token requests per client IP"""
+    scope = 'login'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameRateThrottle(SlidingWindowRateThrottle):
+    """Limit token requests per username, whichever IP they come from"""
+    scope = 'login_username'
+
+    def get_ident_for(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        # Any text can be sent as the username, so hash it into a safe key
+        return hashlib.md5(str(username).lower().encode()).hexdigest()
+
+
+class RegisterRateThrottle(SlidingWindowRateThrottle):
+    """Limit sign-ups per client IP"""
+    scope = 'register'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
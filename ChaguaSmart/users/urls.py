@@ -1,8 +1,8 @@
 from django.urls import path
 from rest_framework.views import APIView  # Add this import
 from rest_framework.response import Response  # Add this import
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import RegisterView, RosterImportView, ThrottledTokenObtainPairView
 
 app_name = 'users'
 
@@ -20,8 +20,11 @@ urlpatterns = [
     
     # Registration endpoint
     path('register/', RegisterView.as_view(), name='register'),
+
+    # Bulk roster import (admin only)
+    path('roster/', RosterImportView.as_view(), name='roster-import'),
     
     # JWT token endpoints
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', ThrottledTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
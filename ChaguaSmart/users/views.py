@@ -1,13 +1,24 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny
 from django.utils.timezone import now
 from django.db.models import Count
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.views import TokenObtainPairView
 # Import models from polls app, not users app
 from polls.models import Poll, Option, Vote 
-from .serializers import RegisterSerializer
+from .roster import create_roster_users, import_roster, iter_roster_rows
+from .serializers import RegisterSerializer, RosterUserSerializer
+from .throttles import (
+    LoginRateThrottle,
+    LoginUsernameRateThrottle,
+    RegisterRateThrottle,
+    ThrottleFirstMixin,
+)
 from polls.serializers import PollSerializer, VoteSerializer
+from polls.throttles import PollVoteRateThrottle, VoteRateThrottle
+from polls.voting import create_vote
 
 User = get_user_model()
 
@@ -21,26 +32,27 @@ class PollListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class CastVoteView(generics.CreateAPIView):
+class CastVoteView(ThrottleFirstMixin, generics.CreateAPIView):
     serializer_class = VoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [VoteRateThrottle, PollVoteRateThrottle]
 
     def create(self, request, *args, **kwargs):
         user = request.user
         poll_id = self.kwargs.get("poll_id")
         option_id = request.data.get("option")
 
-        # Check if user has already voted on this poll
-        if Vote.objects.filter(user=user, option__poll_id=poll_id).exists():
-            return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            option = Option.objects.get(id=option_id, poll_id=poll_id)
-            vote = Vote.objects.create(user=user, option=option)
-            return Response(VoteSerializer(vote).data, status=status.HTTP_201_CREATED)
+            option = Option.objects.select_related('poll').get(id=option_id, poll_id=poll_id)
         except Option.DoesNotExist:
             return Response({"detail": "Invalid option."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # The (poll, user) unique constraint rejects duplicate votes
+        vote = create_vote(option.poll, option, user)
+        if vote is None:
+            return Response({"detail": "You have already voted."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(VoteSerializer(vote).data, status=status.HTTP_201_CREATED)
+
 
 class PollResultsView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
@@ -52,8 +64,54 @@ class PollResultsView(generics.RetrieveAPIView):
         return Response(data)
 
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(ThrottleFirstMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_classes = [RegisterRateThrottle]
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    """Token endpoint limited per IP and per username.
+
+    Each request hashes a password, so unthrottled it lets a single client
+    tie up a worker. The token views skip authentication, so throttles
+    already run before any database work.
+    """
+    throttle_classes = [LoginRateThrottle, LoginUsernameRateThrottle]
+
+
+class RosterImportView(generics.GenericAPIView):
+    """Provision a roster of students in one request.
+
+    Either POST a JSON list of users (passwords are hashed in a process pool
+    and existing usernames skipped), or upload a CSV/JSONL roster as the
+    ``file`` field of a multipart request. Uploaded rosters are streamed and
+    upserted in batches, and per-row errors are reported. The format is
+    taken from the file extension unless ``?input=csv|jsonl`` is given.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = RosterUserSerializer
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        roster_file = request.FILES.get('file')
+        if roster_file is not None:
+            fmt = request.query_params.get('input')
+            if fmt is None:
+                fmt = 'jsonl' if roster_file.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+            if fmt not in ('csv', 'jsonl'):
+                return Response(
+                    {"detail": "input must be csv or jsonl."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            result = import_roster(iter_roster_rows(roster_file, fmt))
+            return Response(result, status=status.HTTP_200_OK)
 
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        created, skipped = create_roster_users(serializer.validated_data)
+        return Response(
+            {"created": created, "skipped": skipped},
+            status=status.HTTP_201_CREATED
+        )
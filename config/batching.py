@@ -0,0 +1,102 @@
+import atexit
+import logging
+import threading
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class BatchBuffer:
+    """Collect items in memory and write them in batches.
+
+    A batch is written as soon as ``flush_size`` items are pending, or
+    ``flush_interval`` seconds after the first pending item arrived,
+    whichever comes first. Pending items are also flushed at interpreter
+    exit. A batch that fails to write is kept and retried with the next
+    flush, up to ``max_attempts`` writes in all. Subclasses implement
+    ``write(items)``, and may implement ``failed(items)`` to undo what they
+    promised for a batch that was given up on.
+    """
+
+    def __init__(self, flush_size, flush_interval, max_attempts=3):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._items = []
+        # (batch, attempts so far) pairs waiting to be written again
+        self._retries = []
+        self._timer = None
+        atexit.register(self.flush)
+
+    def add(self, item):
+        retries = batch = None
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) >= self.flush_size:
+                retries, batch = self._take()
+            else:
+                self._schedule()
+        if batch:
+            self._write_all(retries, batch)
+
+    def flush(self):
+        with self._lock:
+            retries, batch = self._take()
+        self._write_all(retries, batch)
+
+    def write(self, items):
+        raise NotImplementedError
+
+    def failed(self, items):
+        pass
+
+    def _schedule(self):
+        # Must be called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self):
+        # Must be called with the lock held
+        retries, self._retries = self._retries, []
+        items, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return retries, items
+
+    def _write_all(self, retries, batch):
+        for items, attempts in retries:
+            self._write(items, attempts)
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch, attempts=0):
+        attempts += 1
+        try:
+            self.write(batch)
+        except Exception:
+            if attempts < self.max_attempts:
+                logger.warning(
+                    "Failed to write a batch of %d item(s) (attempt %d of %d), will retry",
+                    len(batch), attempts, self.max_attempts, exc_info=True
+                )
+                with self._lock:
+                    self._retries.append((batch, attempts))
+                    self._schedule()
+                return
+            logger.exception(
+                "Failed to write a batch of %d item(s) after %d attempts, giving up",
+                len(batch), attempts
+            )
+            self.failed(batch)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own DB connection
+            connections.close_all()
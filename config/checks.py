@@ -0,0 +1,15 @@
+from django.conf import settings
+
+# Backends whose add() and incr() are single atomic operations on a server
+# every worker shares. FileBasedCache implements them as a read followed by
+# a write, and LocMemCache only within one process.
+ATOMIC_CACHE_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+def cache_is_atomic(alias='default'):
+    """Whether the cache can hold counters and locks shared by all workers"""
+    return settings.CACHES[alias]['BACKEND'] in ATOMIC_CACHE_BACKENDS
@@ -0,0 +1,134 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to ``DATABASE_REPLICA_ALIAS``
+(when a replica is configured) only inside ``use_replica()``, which
+``ReplicaRoutingMiddleware`` enters for safe-method requests. Everything
+else, including reads in a POST that check what the same request or the
+user's previous request wrote, stays on the primary.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+
+from users.authentication import get_token_user_id
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextmanager
+def use_replica():
+    """Route the reads made inside the block to the replica"""
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Route the reads made inside the block to the primary, e.g. to read
+    back a row written moments ago while serving a GET"""
+    token = _read_from_replica.set(False)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside ``use_replica()``, all else to default"""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICA_ALIAS:
+            return settings.DATABASE_REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def pin_key(user_id):
+    return f'db_pin_user_{user_id}'
+
+
+_DONE = object()
+
+
+def _iter_in_replica(iterator):
+    # Enter use_replica() around each chunk rather than across the yields,
+    # so the server loop consuming the body never runs inside it
+    iterator = iter(iterator)
+    while True:
+        with use_replica():
+            chunk = next(iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+async def _aiter_in_replica(iterator):
+    iterator = aiter(iterator)
+    while True:
+        with use_replica():
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe-method requests from the replica.
+
+    A user who has just written something is pinned to the primary for
+    ``DATABASE_REPLICA_PIN_SECONDS``, so they read their own vote back even
+    while the replica lags behind. The pin is kept in the cache under the
+    user's id, which for safe requests is read from the session or the
+    bearer token without a query. Streamed response bodies, which are read
+    after the view returns, are read from the replica too.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in self.SAFE_METHODS:
+            response = self.get_response(request)
+            # Set by the view's authentication, DRF's included
+            user = getattr(request, 'user', None)
+            if (response.status_code < 400 and settings.DATABASE_REPLICA_PIN_SECONDS
+                    and user is not None and user.is_authenticated):
+                cache.set(pin_key(user.pk), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+            return response
+
+        user_id = self.get_user_id(request)
+        if user_id is not None and cache.get(pin_key(user_id)):
+            return self.get_response(request)
+        with use_replica():
+            response = self.get_response(request)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _aiter_in_replica(response.streaming_content)
+            else:
+                response.streaming_content = _iter_in_replica(response.streaming_content)
+        return response
+
+    def get_user_id(self, request):
+        session = getattr(request, 'session', None)
+        if session is not None and session.get(SESSION_KEY):
+            return session[SESSION_KEY]
+        return get_token_user_id(request)
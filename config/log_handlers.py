@@ -0,0 +1,52 @@
+import atexit
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class StartedQueueListener(QueueListener):
+    """A ``QueueListener`` that starts on creation and stops at exit"""
+
+    def __init__(self, queue, *handlers, respect_handler_level=False):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.start()
+        atexit.register(self.stop)
+
+
+class QueueListenerHandler(QueueHandler):
+    """Hand log records to a background thread that writes them.
+
+    The calling thread only formats the message and puts the record on an
+    in-memory queue; the wrapped ``handlers`` (files, streams) are written
+    to by a ``QueueListener`` thread, so request threads never wait on disk
+    or on the stdout lock. Only for Python < 3.12, whose ``dictConfig``
+    cannot build the listener itself; use ``queue_handler_config``.
+    """
+
+    def __init__(self, handlers, maxsize=-1):
+        super().__init__(queue.Queue(maxsize))
+        # dictConfig passes a ConvertingList, which only resolves cfg://
+        # references on item access
+        handlers = [handlers[i] for i in range(len(handlers))]
+        self.listener = StartedQueueListener(self.queue, *handlers, respect_handler_level=True)
+
+
+def queue_handler_config(handler_names):
+    """``LOGGING`` entry for a handler writing to ``handler_names`` from a
+    background thread.
+
+    Since Python 3.12, ``dictConfig`` builds the listener for a
+    ``QueueHandler`` from its ``handlers`` key (and rejects subclasses that
+    take other constructor arguments), but does not start it.
+    """
+    if sys.version_info >= (3, 12):
+        return {
+            'class': 'logging.handlers.QueueHandler',
+            'handlers': list(handler_names),
+            'respect_handler_level': True,
+            'listener': 'config.log_handlers.StartedQueueListener',
+        }
+    return {
+        'class': 'config.log_handlers.QueueListenerHandler',
+        'handlers': [f'cfg://handlers.{name}' for name in handler_names],
+    }
@@ -14,6 +14,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from .log_handlers import queue_handler_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,16 +44,21 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'drf_yasg',
+    'channels',
     
     # Local apps
     'users',  
     'polls',  
+    'chaguapoll',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Safe-method requests read from the replica database, if configured.
+    # After the sessions, whose user id it checks for a pin to the primary
+    'config.db_routers.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -79,16 +86,83 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# HTTP and WebSockets (live results); production runs this one
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# SQLite for local development. PostgreSQL is used when DJANGO_DB_ENGINE is
+# 'postgresql' or, by default, when DJANGO_DB_HOST is set (docker-compose).
+DB_ENGINE = os.environ.get(
+    'DJANGO_DB_ENGINE', 'postgresql' if os.environ.get('DJANGO_DB_HOST') else 'sqlite3'
+)
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'chaguasmart'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'chaguasmart'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', 'chaguasmart'),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # Keep each worker's connection open between requests instead of
+            # paying TCP and auth setup every time, and check it is still
+            # alive before reusing it
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DJANGO_DB_CONNECT_TIMEOUT', 5)),
+            },
+            # Needed behind a transaction-mode pooler such as PgBouncer
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.environ.get('DJANGO_DB_DISABLE_SERVER_SIDE_CURSORS', 'false').lower() == 'true'
+            ),
+        }
+    }
+
+    # Optionally share a psycopg connection pool between the threads of a
+    # worker process (ASGI, threaded gunicorn). Pooled connections are
+    # returned to the pool after each request, so CONN_MAX_AGE must be 0.
+    if os.environ.get('DJANGO_DB_POOL', 'false').lower() == 'true':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DJANGO_DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',  # This will create it in ChaguaSmart folder
+        }
+    }
+
+# Optional read replica: safe-method requests read from it, see
+# config/db_routers.py
+if DB_ENGINE == 'postgresql' and os.environ.get('DJANGO_DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DJANGO_DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DJANGO_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DB_ENGINE == 'sqlite3' and os.environ.get('DJANGO_DB_REPLICA_NAME'):
+    # A second SQLite file, to try the routing locally
+    DATABASES['replica'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',  # This will create it in ChaguaSmart folder
+        'NAME': os.environ['DJANGO_DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_ROUTERS = ['config.db_routers.ReplicaRouter']
+DATABASE_REPLICA_ALIAS = 'replica' if 'replica' in DATABASES else None
+# After a successful write, a user reads from the primary for this many
+# seconds so they see their own changes even if the replica lags behind
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 5))
 
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
@@ -140,7 +214,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -153,10 +227,24 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
-        'django_filters.backends.DjangoFilterBackend',
+        'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Per-scope limits for the throttles in users/throttles.py and
+    # polls/throttles.py. Counters live in the default cache, which must be
+    # Redis or Memcached so increments are atomic across workers (see CACHES;
+    # enforced by the users.E001 system check).
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('THROTTLE_RATE_LOGIN', '20/min'),
+        'login_username': os.environ.get('THROTTLE_RATE_LOGIN_USERNAME', '10/min'),
+        'register': os.environ.get('THROTTLE_RATE_REGISTER', '10/hour'),
+        'vote': os.environ.get('THROTTLE_RATE_VOTE', '60/min'),
+        'poll_vote': os.environ.get('THROTTLE_RATE_POLL_VOTE', '5/min'),
+    },
+    # Number of reverse proxies in front of the app, so throttles key on the
+    # client IP from X-Forwarded-For rather than the proxy's address
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
 }
 
 # JWT Settings
@@ -184,6 +272,7 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.CampusTokenObtainPairSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -230,8 +319,60 @@ REDOC_SETTINGS = {
     'LAZY_RENDERING': False,
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Without configuration, a file-based cache shared by the workers on this
+# host, so local runs need no cache server. Its incr() is not atomic, so the
+# throttles need Redis or Memcached: system check users.E001 refuses the
+# file-based cache with throttle rates set unless DEBUG is on. In
+# production set CACHE_LOCATION=redis://<host>:6379/1, which selects Redis,
+# or CACHE_BACKEND as well for another backend.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND') or (
+            'django.core.cache.backends.redis.RedisCache' if os.environ.get('CACHE_LOCATION')
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
+if CACHES['default']['BACKEND'].endswith(('FileBasedCache', 'LocMemCache')):
+    # The default of 300 entries would evict keys within seconds under load
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+    }
+
+# Channel layer, which fans live results out to WebSocket subscribers
+# The in-memory layer only reaches consumers in the same process, so it suits
+# tests and single-worker development. With several workers, or with votes
+# cast by a different process than the one holding the sockets, set
+# CHANNEL_LAYER_URL=redis://<host>:6379/2 (any Redis-compatible server).
+if os.environ.get('CHANNEL_LAYER_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.environ['CHANNEL_LAYER_URL']],
+                # Messages queued per channel before a slow subscriber
+                # starts losing them, and how long they are kept
+                'capacity': int(os.environ.get('CHANNEL_LAYER_CAPACITY', 1000)),
+                'expiry': int(os.environ.get('CHANNEL_LAYER_EXPIRY', 60)),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
+
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'noreply@chaguasmart.com'
+
+# Notification emails are sent from a background thread, this many messages
+# per SMTP connection
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.environ.get('NOTIFICATION_EMAIL_BATCH_SIZE', 200))
 
 # For production, use:
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -267,6 +408,9 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # Writes to the handlers above from a background thread; the name
+        # must sort after theirs so dictConfig has built them already
+        'queue': queue_handler_config(['console', 'file']),
     },
     'root': {
         'handlers': ['console'],
@@ -274,17 +418,17 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
         'polls': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
         'users': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
@@ -312,6 +456,42 @@ DEFAULT_POLL_DURATION = timedelta(days=7)  # Default poll duration
 MAX_POLL_OPTIONS = 10  # Maximum options per poll
 MIN_POLL_OPTIONS = 2   # Minimum options per poll
 
+# Cache TTLs (in seconds); signals invalidate these keys on writes
+POLL_RESULTS_CACHE_TTL = int(os.environ.get('POLL_RESULTS_CACHE_TTL', 60))
+POLL_DETAIL_CACHE_TTL = int(os.environ.get('POLL_DETAIL_CACHE_TTL', 300))
+ACTIVE_POLLS_CACHE_TTL = int(os.environ.get('ACTIVE_POLLS_CACHE_TTL', 30))
+# Authenticated user rows, see users.authentication.CachedJWTAuthentication
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+# Live results: vote deltas are coalesced into at most this many WebSocket
+# broadcasts per second per poll
+RESULTS_BROADCASTS_PER_SECOND = int(os.environ.get('RESULTS_BROADCASTS_PER_SECOND', 4))
+
+# Seconds between run_poll_scheduler sweeps, which open and close polls as
+# their start and end times pass
+POLL_SCHEDULER_INTERVAL = float(os.environ.get('POLL_SCHEDULER_INTERVAL', 15))
+
+# Vote ingestion: 'direct' inserts each vote in the request, 'buffered' checks
+# for duplicates against the cache, answers 202 and writes accepted votes in
+# batches with bulk_create. Buffered mode needs a Redis or Memcached cache,
+# which polls.checks enforces.
+VOTE_INGESTION_MODE = os.environ.get('VOTE_INGESTION_MODE', 'direct')
+VOTE_BUFFER_FLUSH_SIZE = int(os.environ.get('VOTE_BUFFER_FLUSH_SIZE', 500))
+VOTE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('VOTE_BUFFER_FLUSH_INTERVAL', 0.5))  # seconds
+VOTE_HAS_VOTED_CACHE_TTL = int(os.environ.get('VOTE_HAS_VOTED_CACHE_TTL', 60 * 60 * 24 * 7))
+
+# Login audit trail: attempts are written in batches of this size, or this
+# many seconds after the first queued attempt
+LOGIN_AUDIT_FLUSH_SIZE = int(os.environ.get('LOGIN_AUDIT_FLUSH_SIZE', 200))
+LOGIN_AUDIT_FLUSH_INTERVAL = float(os.environ.get('LOGIN_AUDIT_FLUSH_INTERVAL', 0.5))
+# Failed logins per username are counted over this window (seconds) and
+# logged as a warning from this many attempts
+FAILED_LOGIN_WINDOW = int(os.environ.get('FAILED_LOGIN_WINDOW', 15 * 60))
+FAILED_LOGIN_ALERT_THRESHOLD = int(os.environ.get('FAILED_LOGIN_ALERT_THRESHOLD', 5))
+
+# Poll exports read votes from the database this many rows at a time
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
 # Campus options (you can expand this list)
 CAMPUS_CHOICES = [
     ('main', 'Main Campus'),
@@ -0,0 +1,35 @@
+"""
+Settings profile for the test suite and benchmarks.
+
+Identical to config.settings except that passwords are hashed with a fast,
+insecure hasher, so creating users in test setUp methods and benchmark
+seeds does not spend most of the run in PBKDF2, the cache is in process
+memory, so no Redis server is needed, and the write buffers only flush when
+told to. Never use in production.
+
+    DJANGO_SETTINGS_MODULE=config.settings_test python manage.py benchmark_endpoints
+
+``manage.py test`` picks this profile by default.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+# LocMemCache's incr() is atomic within the one process the tests run in,
+# which is all the throttles need here
+SILENCED_SYSTEM_CHECKS = ['users.E001']
+
+# Tests flush the vote and login audit buffers themselves; a timer flushing
+# from its own thread would write mid-test, and lock the SQLite database
+VOTE_BUFFER_FLUSH_INTERVAL = 3600
+LOGIN_AUDIT_FLUSH_INTERVAL = 3600
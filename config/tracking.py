@@ -0,0 +1,48 @@
+class FieldTrackingMixin:
+    """Detect changes to a model's ``TRACKED_FIELDS`` in memory.
+
+    The values loaded from the database, or last saved, are kept on the
+    instance, so signal handlers can tell what a save changes without
+    reading the row again. Call ``snapshot_tracked_fields()`` after saving,
+    e.g. from a post_save receiver.
+    """
+    TRACKED_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so changes can be detected in memory
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in cls.TRACKED_FIELDS
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # The reloaded values are the saved state again
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self.TRACKED_FIELDS:
+            if fields is None or field in fields:
+                loaded[field] = getattr(self, field)
+        self._loaded_values = loaded
+
+    def snapshot_tracked_fields(self):
+        """Record the current tracked values as the saved state"""
+        self._loaded_values = {
+            field: getattr(self, field) for field in self.TRACKED_FIELDS
+        }
+
+    def get_changed_fields(self):
+        """Return the tracked fields that differ from the saved state.
+
+        Returns None when the saved state is unknown, e.g. for an instance
+        built by hand rather than loaded from the database.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {
+            field for field, value in loaded.items()
+            if getattr(self, field) != value
+        }
@@ -35,6 +35,9 @@ urlpatterns = [
     
     # Polls app URLs
     path('api/polls/', include('polls.urls')),
+
+    # Chaguapoll API URLs
+    path('api/chaguapoll/', include(('chaguapoll.api.urls', 'chaguapoll'))),
     
     # API Documentation
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),